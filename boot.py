@@ -20,14 +20,24 @@ sys.path.insert(0, os.path.join(base_path, 'include', 'pytz', 'src'))
 sys.path.insert(0, os.path.join(base_path, 'include', 'pyyaml', 'lib'))
 
 from .commands.GetObjectsFromServer import GetObjectsFromServer
+from .commands.GetObjectsFromServer import CancelGetObjectsFromServer
 from .commands.PutObjectToServer import PutObjectToServer
+from .commands.PushChangedObjectsToServer import PushChangedObjectsToServer
+from .commands.CheckAllRules import CheckAllRules
 from .commands.RunTurboIntegratorProcess import RunTurboIntegratorProcess
+from .commands.RunTurboIntegratorBatch import RunTurboIntegratorBatch
+from .commands.CancelTurboIntegratorProcess import CancelTurboIntegratorProcess
+from .commands.ShowRunHistory import ShowRunHistory
 from .commands.UpdateTm1Project import UpdateTm1Project
 from .commands.ClearTurboIntegratorLogs import ClearTurboIntegratorLogs
 from .commands.DisplayTm1OpsConsoleCommand import DisplayTm1OpsConsole
 from .commands.DisplayTm1OpsConsoleCommand import KillTm1ThreadCommand
+from .commands.DisplayTm1OpsConsoleCommand import DisplayTm1SessionsConsole
+from .commands.FilterTm1OpsConsole import FilterTm1OpsConsole
+from .commands.ShowLockContentionReport import ShowLockContentionReport
 from .commands.RefreshTm1OpsConsole import RefreshTm1OpsConsoleCommand
 from .commands.FormatTurboIntegratorProcess import *
 from .commands.ProjectCompletions import ProjectCompletions
 from .commands.CreateNewTm1Project import CreateNewTm1Project
+from .commands.SessionEventListener import SessionEventListener
 # from .commands.Test import RunTest
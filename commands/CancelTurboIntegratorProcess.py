@@ -0,0 +1,28 @@
+import sublime
+import sublime_plugin
+
+from pelle.Runs import get_runs
+from pelle.Utils import run_async
+
+
+class CancelTurboIntegratorProcess(sublime_plugin.WindowCommand):
+    def run(self):
+        window = sublime.active_window()
+        runs = get_runs()
+        if not runs:
+            window.status_message('TM1: Run: no processes are running')
+            return
+
+        items = [sublime.QuickPanelItem(
+            run.name,
+            ', '.join('{}={}'.format(k, v) for k, v in run.parameters.items()),
+            '{:.0f}s elapsed'.format(run.elapsed)
+        ) for run in runs]
+
+        def on_select(index):
+            if index < 0:
+                return
+            window.status_message('TM1: Run: cancelling {}'.format(runs[index].name))
+            run_async(runs[index].cancel)
+
+        window.show_quick_panel(items, on_select, placeholder='Select a running process to cancel')
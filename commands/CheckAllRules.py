@@ -0,0 +1,22 @@
+import sublime
+import sublime_plugin
+
+from pelle.Jobs import start_job
+from pelle.Pelle import get_session
+from pelle.Utils import show_error_panel
+
+
+class CheckAllRules(sublime_plugin.WindowCommand):
+    def run(self):
+        window = sublime.active_window()
+        if not window.project_file_name():
+            sublime.message_dialog('There is no project opened in this current window')
+            return
+
+        def do_check_rules(job):
+            session = get_session(window)
+            errors = session.check_all_rules(job)
+            if errors:
+                sublime.set_timeout(lambda: show_error_panel(window, 'TM1 Rule Check', errors), 0)
+
+        start_job(('check_rules', window.project_file_name()), window, 'TM1: Check Rules', do_check_rules)
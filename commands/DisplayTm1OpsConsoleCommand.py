@@ -1,43 +1,33 @@
-import threading
-import time
-
 import sublime
 import sublime_plugin
 
 from pelle.Pelle import get_session
-
-DEFAULT_REFRESH = 2.5
+from pelle.Poller import CONSOLE_PANEL, SESSIONS_PANEL, DEFAULT_REFRESH, DEFAULT_HISTORY_SIZE, subscribe_console
 
 
 class DisplayTm1OpsConsole(sublime_plugin.WindowCommand):
+    panel = CONSOLE_PANEL
 
     def run(self):
         self.active_project = sublime.active_window().project_data()
         self.project_settings = self.active_project['settings']
         self.session = get_session(sublime.active_window())
 
-        # Get instance name
-        window_name = 'Console'
-
         # Create Output Window
-        self.output = self.window.create_output_panel(window_name)
-        self.output.run_command('erase_view')
-        self.window.run_command('show_panel', {'panel': 'output.{}'.format(window_name)})
+        self.output = self.window.create_output_panel(self.panel)
+        self.window.run_command('show_panel', {'panel': 'output.{}'.format(self.panel)})
 
         self.output.set_read_only(True)
 
-        t = threading.Thread(target=self.run_refresh, daemon=True)
-        t.start()
+        # Every console of the same server is refreshed by one poller
+        refresh_time = self.project_settings.get('ConsoleRefreshTime', DEFAULT_REFRESH)
+        history_size = self.project_settings.get('console_history_size', DEFAULT_HISTORY_SIZE)
+        subscribe_console(self.session.connection.key, self.window, self.output, self.panel, refresh_time,
+                          history_size)
 
-    def run_refresh(self):
-        if 'ConsoleRefreshTime' in self.project_settings:
-            refresh_time = self.project_settings['ConsoleRefreshTime']
-        else:
-            refresh_time = DEFAULT_REFRESH
 
-        while self.output.window():
-            self.output.run_command('refresh_tm1_ops_console')
-            time.sleep(float(refresh_time))
+class DisplayTm1SessionsConsole(DisplayTm1OpsConsole):
+    panel = SESSIONS_PANEL
 
 
 class KillTm1ThreadCommand(sublime_plugin.WindowCommand):
@@ -0,0 +1,54 @@
+import sublime
+import sublime_plugin
+
+from pelle.Console import FILTER_ACTIVE, FILTER_USER, FILTER_OBJECT, FILTER_MIN_ELAPSED, describe_filters
+from pelle.Poller import wake_consoles
+
+
+class FilterTm1OpsConsole(sublime_plugin.WindowCommand):
+    OPTIONS = [
+        ('Show All Threads', None, None),
+        ('Toggle Active Threads Only', FILTER_ACTIVE, None),
+        ('Filter by User', FILTER_USER, 'User name contains:'),
+        ('Filter by Object', FILTER_OBJECT, 'Object name contains:'),
+        ('Filter by Minimum Elapsed Time', FILTER_MIN_ELAPSED, 'Minimum elapsed seconds:'),
+    ]
+
+    def run(self):
+        filters = self._get_filters()
+        items = [sublime.QuickPanelItem(caption, str(filters.get(key, '')) if key else describe_filters(filters))
+                 for caption, key, _ in self.OPTIONS]
+        self.window.show_quick_panel(items, self.on_select)
+
+    def on_select(self, index):
+        if index < 0:
+            return
+
+        _, key, prompt = self.OPTIONS[index]
+        filters = self._get_filters()
+
+        if not key:
+            self._set_filters({})
+        elif not prompt:
+            filters[key] = not filters.get(key)
+            self._set_filters(filters)
+        else:
+            def on_done(text):
+                text = text.strip()
+                if key == FILTER_MIN_ELAPSED and text and not text.isdigit():
+                    sublime.message_dialog('The minimum elapsed time is a whole number of seconds')
+                    return
+                filters[key] = int(text) if key == FILTER_MIN_ELAPSED and text else text
+                self._set_filters(filters)
+
+            self.window.show_input_panel(prompt, str(filters.get(key, '')), on_done, None, None)
+
+    def _get_filters(self):
+        return dict((self.window.project_data() or {}).get('settings', {}).get('console_filter', {}))
+
+    def _set_filters(self, filters):
+        project_data = self.window.project_data()
+        project_data.setdefault('settings', {})['console_filter'] = {k: v for k, v in filters.items() if v}
+        self.window.set_project_data(project_data)
+        wake_consoles()
+        self.window.status_message('TM1 Console: showing {}'.format(describe_filters(filters)))
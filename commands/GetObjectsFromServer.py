@@ -1,11 +1,26 @@
 import sublime
 import sublime_plugin
 
+from pelle.Jobs import start_job, cancel_job
 from pelle.Pelle import get_session
 
 
 class GetObjectsFromServer(sublime_plugin.WindowCommand):
     def run(self):
         window = sublime.active_window()
-        session = get_session(window)
-        session.refresh_objects()
+        if not window.project_file_name():
+            sublime.message_dialog('There is no project opened in this current window')
+            return
+
+        def do_refresh_objects(job):
+            session = get_session(window)
+            session.refresh_objects(job)
+
+        start_job(('get', window.project_file_name()), window, 'TM1: Get', do_refresh_objects)
+
+
+class CancelGetObjectsFromServer(sublime_plugin.WindowCommand):
+    def run(self):
+        window = sublime.active_window()
+        if not cancel_job(('get', window.project_file_name())):
+            window.status_message('TM1: Get: no pull is running')
@@ -3,6 +3,8 @@
 import sublime
 import sublime_plugin
 
+from pelle import Cache
+
 
 def all_match(view, locs, selector):
     for loc in locs:
@@ -11,11 +13,20 @@ def all_match(view, locs, selector):
     return True
 
 
+def is_tm1_project(window):
+    settings = window.project_data().get('settings', {})
+    return bool(window.project_file_name() and
+                (settings.get('tm1_connection') or settings.get('TM1ConnectionSettings')))
+
+
 class ProjectCompletions(sublime_plugin.EventListener):
 
     def on_query_completions(self, view, prefix, locations):
         if view.window() and view.window().project_data():
             completions = view.window().project_data().get("completions")
+            if not completions and is_tm1_project(view.window()):
+                # Not pulled into this project yet, fall back to the local metadata cache
+                completions = Cache.get_cache(view.window()).get_completions()
             if isinstance(completions, list):
                 return completions
             elif isinstance(completions, dict):
@@ -0,0 +1,38 @@
+import os
+
+import sublime
+import sublime_plugin
+
+from pelle.Jobs import start_job
+from pelle.Pelle import get_session
+
+
+class PushChangedObjectsToServer(sublime_plugin.WindowCommand):
+    def run(self):
+        window = sublime.active_window()
+        if not window.project_file_name():
+            sublime.message_dialog('There is no project opened in this current window')
+            return
+
+        def do_push_objects(job):
+            session = get_session(window)
+            errors = session.push_changed_objects(job)
+            if errors:
+                sublime.set_timeout(lambda: self._show_errors(window, errors), 0)
+
+        start_job(('push', window.project_file_name()), window, 'TM1: Push', do_push_objects)
+
+    def _show_errors(self, window, errors):
+        items = [sublime.QuickPanelItem(
+            '{}{}'.format(name, os.path.splitext(file)[1]),
+            message,
+            'Line {}'.format(line + 1)
+        ) for name, file, line, message in errors]
+
+        def on_select(index):
+            if index < 0:
+                return
+            _, file, line, _ = errors[index]
+            window.open_file('{}:{}'.format(file, line + 1), sublime.ENCODED_POSITION)
+
+        window.show_quick_panel(items, on_select)
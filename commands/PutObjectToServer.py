@@ -5,8 +5,8 @@ from pelle.Pelle import get_session
 
 
 class PutObjectToServer(sublime_plugin.WindowCommand):
-    def run(self):
+    def run(self, force=False):
         window = sublime.active_window()
         view = window.active_view()
         session = get_session(window)
-        session.update_object(view)
+        session.update_object(view, force)
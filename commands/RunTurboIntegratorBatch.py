@@ -0,0 +1,42 @@
+import sublime
+import sublime_plugin
+
+from pelle.Batch import parse_batch
+from pelle.Jobs import start_job
+from pelle.Pelle import get_session
+
+
+class RunTurboIntegratorBatch(sublime_plugin.WindowCommand):
+    def run(self):
+        window = sublime.active_window()
+        view = window.active_view()
+        if not window.project_file_name() or not view:
+            sublime.message_dialog('Open a batch file in a TM1 project to run a batch')
+            return
+
+        # Selected jobs run on their own, otherwise the whole file
+        selected = [view.substr(region) for region in view.sel() if not region.empty()]
+        text = '\n'.join(selected) if selected else view.substr(sublime.Region(0, view.size()))
+
+        try:
+            batch_jobs, concurrency = parse_batch(text)
+        except Exception as e:
+            sublime.message_dialog('Unable to read the batch:\n\n{}'.format(e))
+            return
+
+        if not batch_jobs:
+            sublime.message_dialog('The batch does not contain any jobs')
+            return
+
+        def do_run_batch(job):
+            session = get_session(window)
+            summary = session.run_batch(job, batch_jobs, concurrency)
+            sublime.set_timeout(lambda: self._show_summary(window, summary), 0)
+
+        start_job(('batch', window.project_file_name()), window, 'TM1: Batch', do_run_batch)
+
+    def _show_summary(self, window, summary):
+        output = window.create_output_panel('TM1 Batch')
+        output.run_command('erase_view')
+        output.run_command('append', {'characters': summary})
+        window.run_command('show_panel', {'panel': 'output.TM1 Batch'})
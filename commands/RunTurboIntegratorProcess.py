@@ -1,10 +1,14 @@
 import os
 import re
+import traceback
 
 import sublime
 import sublime_plugin
+from TM1py import Process
 
+from pelle import Cache
 from pelle.Pelle import get_session
+from pelle.Utils import run_async
 
 
 class RunTurboIntegratorProcess(sublime_plugin.TextCommand):
@@ -14,7 +18,8 @@ class RunTurboIntegratorProcess(sublime_plugin.TextCommand):
             return
 
         # Run Process
-        self.session.run_process(process, kwargs)
+        session = get_session(self.view.window())
+        session.run_process(process, kwargs)
 
     def input(self, args):
         print('Input called with ' + str(args))
@@ -22,12 +27,12 @@ class RunTurboIntegratorProcess(sublime_plugin.TextCommand):
             self.process = None
             self.window = sublime.active_window()
             self.view = self.window.active_view()
-            self.session = get_session(self.window)
+            self.cache = Cache.get_cache(self.window)
 
         if 'process' not in args:
-            return ProcessInputHandler()
+            return ProcessInputHandler(self.cache)
         elif not self.process:
-            self.process = self.session.tm1.processes.get(args['process'])
+            self.process = self._get_process(args['process'])
 
         required = [p for p in self.process.parameters if p['Name'] not in args]
         if required:
@@ -42,20 +47,41 @@ class RunTurboIntegratorProcess(sublime_plugin.TextCommand):
         except:
             return 'Execute Process'
 
+    def _get_process(self, name):
+        cached = self.cache.get(Cache.PROCESS, name) if self.cache else None
+        if cached:
+            return Process(name=name, parameters=cached['parameters'])
+
+        session = get_session(self.window)
+        return session.tm1.processes.get(name)
+
 
 class ProcessInputHandler(sublime_plugin.ListInputHandler):
-    def __init__(self):
+    def __init__(self, cache):
         self.window = sublime.active_window()
         self.view = self.window.active_view()
-        self.session = get_session(self.window)
 
         self.process = None
-        # Get processes, reorder with callers on top
-        processes = self.session.tm1.processes.get_all_names()
+        processes = cache.names(Cache.PROCESS) if cache else []
+        if processes:
+            # Picker opens straight from the local cache, the server list is picked up on the next run
+            run_async(self.refresh_cache)
+        else:
+            session = get_session(self.window)
+            processes = session.tm1.processes.get_all_names()
+
+        # Reorder with callers on top
         callers = [p for p in processes if re.search(r'(\.?)(Call(er)?)(\.?)', p, re.IGNORECASE)]
         not_callers = [p for p in processes if p not in callers]
         self.processes = callers + not_callers
 
+    def refresh_cache(self):
+        try:
+            session = get_session(self.window, quiet=True)
+            session.refresh_process_cache()
+        except Exception:
+            traceback.print_exc()
+
     def description(self, text, args):
         return str(args)
         # return text
@@ -0,0 +1,11 @@
+import sublime_plugin
+
+from pelle.Pelle import release_session
+
+
+class SessionEventListener(sublime_plugin.EventListener):
+    def on_pre_close_window(self, window):
+        release_session(window)
+
+    def on_pre_close_project(self, window):
+        release_session(window)
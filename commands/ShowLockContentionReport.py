@@ -0,0 +1,24 @@
+import sublime
+import sublime_plugin
+
+from pelle.Contention import contention_report
+from pelle.Pelle import get_session
+from pelle.Poller import get_poller
+
+
+class ShowLockContentionReport(sublime_plugin.WindowCommand):
+    def run(self):
+        window = sublime.active_window()
+        session = get_session(window)
+
+        poller = get_poller(session.connection.key)
+        if not poller or not poller.history:
+            sublime.message_dialog('The lock contention report is built from the snapshots of the TM1 console. '
+                                   'Open the console and leave it visible while the server is busy.')
+            return
+
+        view = window.new_file()
+        view.set_name('TM1 Lock Contention')
+        view.set_scratch(True)
+        view.run_command('append', {'characters': contention_report(list(poller.history))})
+        view.set_read_only(True)
@@ -0,0 +1,54 @@
+import statistics
+import time
+
+import sublime
+import sublime_plugin
+from prettytable import PrettyTable
+
+from pelle import History
+
+SPARKS = '▁▂▃▄▅▆▇█'
+
+
+class ShowRunHistory(sublime_plugin.WindowCommand):
+    def run(self):
+        window = sublime.active_window()
+        history = History.get_history(window)
+        if not history or not history.processes():
+            window.status_message('TM1: Run: no runs recorded for this project yet')
+            return
+
+        table = PrettyTable(border=False)
+        table.field_names = ['Process', 'Runs', 'Last Run', 'Last', 'Rows', 'Median', 'Min', 'Max', 'Trend', 'Status']
+        table.align = 'l'
+        table.max_width = 1000
+
+        for process in history.processes():
+            # Oldest first, so the trend reads left to right
+            runs = list(reversed(history.runs(process)))
+            durations = [run['duration'] for run in runs]
+            last = runs[-1]
+
+            table.add_row([
+                process,
+                len(runs),
+                time.strftime('%Y-%m-%d %H:%M', time.localtime(last['started'])),
+                '{:.1f}s'.format(last['duration']),
+                '' if last['rows'] is None else last['rows'],
+                '{:.1f}s'.format(statistics.median(durations)),
+                '{:.1f}s'.format(min(durations)),
+                '{:.1f}s'.format(max(durations)),
+                self._trend(durations),
+                last['status'] + (' (slower than usual)' if last['regression'] else '')
+            ])
+
+        output = window.create_output_panel('TM1 Run History')
+        output.run_command('erase_view')
+        output.run_command('append', {'characters': table.get_string()})
+        window.run_command('show_panel', {'panel': 'output.TM1 Run History'})
+
+    def _trend(self, durations):
+        low, high = min(durations), max(durations)
+        if high == low:
+            return SPARKS[0] * len(durations)
+        return ''.join(SPARKS[int((d - low) / (high - low) * (len(SPARKS) - 1))] for d in durations)
@@ -0,0 +1,32 @@
+import itertools
+
+import yaml
+
+DEFAULT_BATCH_CONCURRENCY = 4
+
+
+def parse_batch(text):
+    data = yaml.safe_load(text)
+    if isinstance(data, list):
+        data = {'jobs': data}
+    if not isinstance(data, dict) or not isinstance(data.get('jobs'), list):
+        raise ValueError('A batch is a list of jobs, or a mapping with a jobs list')
+
+    jobs = []
+    for entry in data['jobs']:
+        if isinstance(entry, str):
+            entry = {'process': entry}
+        if not isinstance(entry, dict) or 'process' not in entry:
+            raise ValueError('Every batch job needs a process: {}'.format(entry))
+
+        parameters = entry.get('parameters') or {}
+
+        # A sweep runs the process once for every combination of the listed values
+        sweep = entry.get('sweep') or {}
+        names = list(sweep)
+        for values in itertools.product(*[v if isinstance(v, list) else [v] for v in sweep.values()]):
+            combination = dict(parameters)
+            combination.update(zip(names, values))
+            jobs.append((entry['process'], combination))
+
+    return jobs, data.get('concurrency')
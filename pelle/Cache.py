@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import sublime
+from TM1py import Cube, Process
+
+from pelle import Utils
+
+CUBE = 'cube'
+PROCESS = 'process'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS objects (
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT,
+    refreshed REAL,
+    PRIMARY KEY (type, name)
+);
+CREATE INDEX IF NOT EXISTS objects_name ON objects (name);
+CREATE INDEX IF NOT EXISTS objects_type ON objects (type);
+'''
+
+CACHES = {}
+CACHES_LOCK = threading.Lock()
+
+
+def get_cache(window):
+    project_file = window.project_file_name()
+    if not project_file:
+        return None
+
+    with CACHES_LOCK:
+        cache = CACHES.get(project_file)
+        if not cache:
+            cache = MetadataCache(cache_file(project_file))
+            CACHES[project_file] = cache
+
+    return cache
+
+
+def cache_folder():
+    folder = os.path.join(sublime.cache_path(), 'TM1')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def cache_file(project_file):
+    folder = cache_folder()
+
+    name = os.path.splitext(os.path.basename(project_file))[0]
+    key = hashlib.sha1(project_file.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(folder, '{}-{}.sqlite'.format(name, key))
+
+
+class MetadataCache:
+    def __init__(self, path):
+        self.path = path
+        self.completions = None
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def replace(self, object_type, objects):
+        refreshed = time.time()
+        rows = [(object_type, name, json.dumps(data), refreshed) for name, data in objects.items()]
+
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM objects WHERE type = ?', (object_type,))
+            self._connection.executemany('INSERT INTO objects (type, name, data, refreshed) VALUES (?, ?, ?, ?)', rows)
+
+        # Completions are derived from cubes and processes, rebuild them on next use
+        self.completions = None
+
+    def update(self, object_type, name, data):
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO objects (type, name, data, refreshed) VALUES (?, ?, ?, ?)',
+                                     (object_type, name, json.dumps(data), time.time()))
+
+        self.completions = None
+
+    def age(self, object_type):
+        # Seconds since the objects of this type were last replaced, None when there are none
+        with self._lock:
+            row = self._connection.execute('SELECT MIN(refreshed) FROM objects WHERE type = ?',
+                                           (object_type,)).fetchone()
+        return time.time() - row[0] if row and row[0] is not None else None
+
+    def names(self, object_type):
+        with self._lock:
+            rows = self._connection.execute('SELECT name FROM objects WHERE type = ? ORDER BY name',
+                                            (object_type,)).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, object_type, name):
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM objects WHERE type = ? AND name = ?',
+                                           (object_type, name)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def items(self, object_type):
+        with self._lock:
+            rows = self._connection.execute('SELECT name, data FROM objects WHERE type = ? ORDER BY name',
+                                            (object_type,)).fetchall()
+        return [(name, json.loads(data)) for name, data in rows]
+
+    def get_completions(self):
+        if self.completions is None:
+            cubes = [Cube(name=name, dimensions=data['dimensions']) for name, data in self.items(CUBE)]
+            processes = [Process(name=name, parameters=data['parameters']) for name, data in self.items(PROCESS)]
+            self.completions = Utils.generate_completions(cubes, processes) if cubes or processes else {}
+        return self.completions
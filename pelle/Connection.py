@@ -0,0 +1,367 @@
+import base64
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+from TM1py import TM1Service
+from TM1py.Exceptions import TM1pyException
+
+DEFAULT_CONNECTION_CHECK_TTL = 30
+DEFAULT_KEEPALIVE_INTERVAL = 300
+
+DPAPI_PREFIX = 'dpapi:'
+PLAIN_PREFIX = 'plain:'
+CRYPTPROTECT_UI_FORBIDDEN = 0x1
+
+CASE_INSENSITIVE_SETTINGS = ('address', 'user', 'namespace')
+
+# Stored session ids are looked up by these alone, the password must never end up in the file
+SESSION_STORE_SETTINGS = ('address', 'port', 'user', 'namespace')
+
+CONNECTIONS = {}
+CONNECTIONS_LOCK = threading.Lock()
+
+
+def connection_key(settings):
+    # Every setting can change the session that is created, only the server and user names ignore case
+    return tuple('{}={}'.format(name, str(value).lower() if name in CASE_INSENSITIVE_SETTINGS else value)
+                 for name, value in sorted(settings.items()) if value is not None)
+
+
+def acquire_connection(settings, connection_check_ttl=DEFAULT_CONNECTION_CHECK_TTL,
+                       keepalive_interval=DEFAULT_KEEPALIVE_INTERVAL, session_store=None):
+    # Windows and projects pointing to the same server and user share one TM1 session and its connection pool
+    key = connection_key(settings)
+    with CONNECTIONS_LOCK:
+        connection = CONNECTIONS.get(key)
+        if not connection:
+            connection = Tm1Connection(key, settings, connection_check_ttl, keepalive_interval, session_store)
+            CONNECTIONS[key] = connection
+        connection.references += 1
+
+    return connection
+
+
+def release_connection(connection):
+    with CONNECTIONS_LOCK:
+        connection.references -= 1
+        if connection.references > 0:
+            return
+        CONNECTIONS.pop(connection.key, None)
+
+    connection.close()
+
+
+class Tm1Connection:
+    def __init__(self, key, settings, connection_check_ttl=DEFAULT_CONNECTION_CHECK_TTL,
+                 keepalive_interval=DEFAULT_KEEPALIVE_INTERVAL, session_store=None):
+        self.key = key
+        self.settings = settings
+        self.session_store = session_store
+        self.references = 0
+        self.connection_state = ConnectionState(connection_check_ttl)
+        self.keepalive_interval = keepalive_interval
+        self.keepalive = None
+        self.tm1 = None
+        self._lock = threading.Lock()
+
+    def connect(self, reconnect=False):
+        with self._lock:
+            if self.tm1 and not reconnect:
+                return
+
+            # Another window sharing this connection may have just reconnected it
+            if self.tm1 and self.connection_state.is_fresh():
+                return
+
+            if self.keepalive:
+                self.keepalive.stop()
+
+            # A session that is known to have expired is not worth resuming
+            previous = self.tm1
+            tm1 = None if reconnect else self._resume_session()
+            self.tm1 = tm1 or TM1Service(**self.settings)
+            self._remember_session()
+
+            if previous:
+                self._discard(previous)
+
+            Reauthenticator(self.tm1._tm1_rest, self.settings, self._remember_session).attach()
+            self.connection_state.attach(self.tm1._tm1_rest)
+
+            self.keepalive = Keepalive(self.tm1._tm1_rest, self.connection_state, self.keepalive_interval)
+            self.keepalive.start()
+
+    def is_connected(self):
+        # Trust a recent successful request instead of probing the server on every command
+        if self.connection_state.is_fresh():
+            return True
+
+        try:
+            return self.tm1._tm1_rest.is_connected()
+        except TM1pyException:
+            return False
+
+    def close(self):
+        if self.keepalive:
+            self.keepalive.stop()
+
+        try:
+            self.tm1.logout()
+        except Exception:
+            traceback.print_exc()
+
+        if self.session_store:
+            self.session_store.set(self.settings, None)
+
+    @staticmethod
+    def _discard(tm1):
+        # Without the hooks a rejected logout can't trigger another login for a session that is being dropped
+        tm1._tm1_rest._s.hooks['response'] = []
+        try:
+            tm1.logout()
+        except Exception as e:
+            print('Unable to log out replaced TM1 session: {}'.format(e))
+        finally:
+            tm1._tm1_rest._s.close()
+
+    def _resume_session(self):
+        session_id = self.session_store.get(self.settings) if self.session_store else None
+        if not session_id:
+            return None
+
+        try:
+            return TM1Service(session_id=session_id, **self.settings)
+        except Exception as e:
+            # Rejected by the server, fall back to a full login
+            print('Unable to resume TM1 session: {}'.format(e))
+            self.session_store.set(self.settings, None)
+            return None
+
+    def _remember_session(self):
+        if not self.session_store:
+            return
+
+        try:
+            self.session_store.set(self.settings, self.tm1._tm1_rest.session_id)
+        except Exception:
+            traceback.print_exc()
+
+
+class SessionStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._drop_legacy_entries()
+
+    def get(self, settings):
+        with self._lock:
+            value = self._load().get(self._entry(settings))
+
+        try:
+            return unprotect(value) if value else None
+        except Exception as e:
+            # Written by an older version or by another user account
+            print('Unable to read stored TM1 session id: {}'.format(e))
+            return None
+
+    def set(self, settings, session_id):
+        with self._lock:
+            sessions = self._load()
+            if session_id:
+                sessions[self._entry(settings)] = protect(session_id)
+            else:
+                sessions.pop(self._entry(settings), None)
+            self._save(sessions)
+
+    def _drop_legacy_entries(self):
+        # Older versions hashed the password into the entry name with SHA-1
+        with self._lock:
+            sessions = self._load()
+            length = len(hashlib.sha256().hexdigest())
+            current = {entry: value for entry, value in sessions.items() if len(entry) == length}
+            if len(current) != len(sessions):
+                self._save(current)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, sessions):
+        # Only readable by the current user on POSIX systems
+        temp = self.path + '.tmp'
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(sessions, f)
+        os.replace(temp, self.path)
+
+    @staticmethod
+    def _entry(settings):
+        # Server and user names are not stored in the clear either
+        names = [str(settings.get(name) or '').lower() for name in SESSION_STORE_SETTINGS]
+        return hashlib.sha256('|'.join(names).encode('utf-8')).hexdigest()
+
+
+def protect(session_id):
+    # Encrypted for the current Windows user with DPAPI, other platforms have no API without extra dependencies
+    if sys.platform == 'win32':
+        return DPAPI_PREFIX + base64.b64encode(_dpapi(session_id.encode('utf-8'), protect=True)).decode('ascii')
+    return PLAIN_PREFIX + session_id
+
+
+def unprotect(value):
+    if value.startswith(DPAPI_PREFIX):
+        return _dpapi(base64.b64decode(value[len(DPAPI_PREFIX):]), protect=False).decode('utf-8')
+    if value.startswith(PLAIN_PREFIX):
+        return value[len(PLAIN_PREFIX):]
+    raise ValueError('unknown format')
+
+
+def _dpapi(data, protect):
+    import ctypes
+    from ctypes import wintypes
+
+    class DataBlob(ctypes.Structure):
+        _fields_ = [('cbData', wintypes.DWORD), ('pbData', ctypes.POINTER(ctypes.c_char))]
+
+    buffer = ctypes.create_string_buffer(data, len(data))
+    blob_in = DataBlob(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+    blob_out = DataBlob()
+
+    function = ctypes.windll.crypt32.CryptProtectData if protect else ctypes.windll.crypt32.CryptUnprotectData
+    if not function(ctypes.byref(blob_in), None, None, None, None, CRYPTPROTECT_UI_FORBIDDEN, ctypes.byref(blob_out)):
+        raise ctypes.WinError()
+
+    try:
+        return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+    finally:
+        ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+
+
+class ConnectionState:
+    def __init__(self, ttl=DEFAULT_CONNECTION_CHECK_TTL):
+        self.ttl = float(ttl)
+        self.last_success = None
+        self.failed = False
+
+    def attach(self, rest):
+        rest._s.hooks['response'].append(self.on_response)
+
+    def on_response(self, response, *args, **kwargs):
+        # Any answer other than an expired session proves the session is alive, even a 404
+        if response.status_code == 401:
+            self.failed = True
+        else:
+            self.last_success = time.monotonic()
+            self.failed = False
+
+    def is_fresh(self):
+        if self.failed or self.last_success is None:
+            return False
+        return time.monotonic() - self.last_success < self.ttl
+
+
+class Reauthenticator:
+    def __init__(self, rest, settings, on_login=None):
+        self.rest = rest
+        self.settings = settings
+        self.on_login = on_login
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def attach(self):
+        # Runs ahead of the other response hooks, so they only see the replayed response
+        self.rest._s.hooks['response'].insert(0, self.on_response)
+
+    def on_response(self, response, *args, **kwargs):
+        # The login request of reauthenticate() passes through here as well
+        if response.status_code != 401 or getattr(self._local, 'authenticating', False):
+            return None
+
+        request = response.request
+        if getattr(request, 'pelle_replayed', False):
+            return None
+
+        with self._lock:
+            # Another thread may have logged in again while this request was in flight
+            session_id = self.rest._s.cookies.get('TM1SessionId')
+            if not session_id or session_id in request.headers.get('Cookie', ''):
+                try:
+                    self.reauthenticate()
+                except Exception:
+                    traceback.print_exc()
+                    return None
+
+        replay = request.copy()
+        replay.pelle_replayed = True
+        replay.headers.pop('Cookie', None)
+        replay.prepare_cookies(self.rest._s.cookies)
+
+        # Release the connection of the rejected response before replaying
+        response.content
+        response.close()
+        return self.rest._s.send(replay, **kwargs)
+
+    def reauthenticate(self):
+        rest = self.rest
+        settings = self.settings
+
+        # Unlike RestService._start_session, the Authorization header is only set on the login request itself,
+        # requests running in other threads must not pick it up
+        headers = dict(rest._headers)
+        if not rest.translate_to_boolean(settings.get('integrated_login', False)):
+            password = settings.get('password')
+            if rest.translate_to_boolean(settings.get('decode_b64', False)):
+                password = rest.b64_decode_password(password)
+            headers['Authorization'] = rest._build_authorization_token(
+                settings.get('user'), password, settings.get('namespace'), settings.get('gateway'),
+                settings.get('cam_passport'), rest._verify)
+        if settings.get('impersonate'):
+            headers['TM1-Impersonate'] = settings.get('impersonate')
+
+        self._local.authenticating = True
+        try:
+            rest._s.cookies.clear()
+            response = rest._s.get(rest._base_url + '/api/v1/Configuration/ProductVersion/$value', headers=headers,
+                                   verify=rest._verify, timeout=rest._timeout)
+            rest.verify_response(response=response)
+        finally:
+            self._local.authenticating = False
+
+        if self.on_login:
+            self.on_login()
+
+
+class Keepalive:
+    def __init__(self, rest, connection_state, interval=DEFAULT_KEEPALIVE_INTERVAL):
+        self.rest = rest
+        self.connection_state = connection_state
+        self.interval = float(interval)
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self.interval > 0:
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            # Nothing to do while commands keep the session busy
+            last_success = self.connection_state.last_success
+            if last_success is not None and time.monotonic() - last_success < self.interval:
+                continue
+
+            try:
+                # An expired session is picked up by the Reauthenticator on the way
+                self.rest.GET('/api/v1/Configuration/ServerName/$value', async_requests_mode=False)
+            except Exception as e:
+                print('TM1 keepalive failed: {}'.format(e))
@@ -0,0 +1,178 @@
+import difflib
+from collections import Counter
+
+import sublime
+
+from pelle.Fetch import filter_clause
+
+THREAD_COLUMNS = ['ID', 'Type', 'Name', 'State', 'Function',
+                  'ObjectName', 'RLocks', 'IXLocks', 'WLocks', 'ElapsedTime', 'WaitTime', 'Info']
+
+SESSION_COLUMNS = ['Session', 'User', 'Context', 'Thread', 'State', 'Function', 'ObjectName', 'ElapsedTime',
+                   'WaitTime']
+
+SESSIONS_URL = '/api/v1/Sessions?$select=ID,Context&$expand=User($select=Name),' \
+               'Threads($select={})'.format(','.join(THREAD_COLUMNS))
+
+FILTER_ACTIVE = 'active_only'
+FILTER_USER = 'user'
+FILTER_OBJECT = 'object'
+FILTER_MIN_ELAPSED = 'min_elapsed'
+
+RENDERERS = {}
+
+# Top border, header and separator come before the first row
+HEADER_LINES = 3
+
+
+def threads_url(filters, clauses=()):
+    # Filtered on the server, idle threads of a busy instance are never sent over the wire
+    clauses = ["Function ne 'GET /api/v1/Threads'"] + list(clauses)
+    if filters.get(FILTER_ACTIVE):
+        clauses.append("State ne 'Idle'")
+    if filters.get(FILTER_USER):
+        clauses.append(filter_clause("contains(tolower(Name),'{}')", filters[FILTER_USER].lower()))
+    if filters.get(FILTER_OBJECT):
+        clauses.append(filter_clause("contains(tolower(ObjectName),'{}')", filters[FILTER_OBJECT].lower()))
+    if filters.get(FILTER_MIN_ELAPSED):
+        clauses.append("ElapsedTime ge duration'PT{}S'".format(int(filters[FILTER_MIN_ELAPSED])))
+
+    return '/api/v1/Threads?$select={}&$filter={}'.format(','.join(THREAD_COLUMNS), ' and '.join(clauses))
+
+
+def contention_url():
+    # The contention report only looks at waiting threads and the threads holding write or intent locks
+    return threads_url({FILTER_ACTIVE: True},
+                       ["(State eq 'Wait' or WaitTime gt duration'PT0S' or WLocks gt 0 or IXLocks gt 0)"])
+
+
+def user_name(name):
+    # Strip the CAM ID that follows the user name on CAM secured servers
+    user = (name or '').split(' ')
+    if user[-1].startswith('CAMID') and len(user) > 1:
+        return ' '.join(user[:-1])
+    return name
+
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+
+
+def session_rows(sessions, elapsed_seconds):
+    rows = []
+    threads = []
+    for session in sorted(sessions, key=lambda s: (user_name((s.get('User') or {}).get('Name')) or '', s['ID'])):
+        user = user_name((session.get('User') or {}).get('Name')) or ''
+        session_threads = [t for t in session.get('Threads', [])
+                           if not t['Function'].startswith('GET /api/v1/Sessions')]
+        for thread in session_threads:
+            thread['Name'] = user_name(thread['Name'])
+        threads += session_threads
+
+        # Session rows carry the totals of their threads, the threads are listed below them
+        elapsed = sum(elapsed_seconds(t['ElapsedTime']) for t in session_threads)
+        wait = sum(elapsed_seconds(t['WaitTime']) for t in session_threads)
+        active = len([t for t in session_threads if t['State'] != 'Idle'])
+        rows.append(['session-{}'.format(session['ID']), [
+            session['ID'], user, session.get('Context') or '', '{} threads'.format(len(session_threads)),
+            '{} active'.format(active), '', '', format_seconds(elapsed), format_seconds(wait)]])
+
+        for thread in session_threads:
+            rows.append(['thread-{}'.format(thread['ID']), [
+                '', '', '', thread['ID'], thread['State'], thread['Function'], thread['ObjectName'],
+                thread['ElapsedTime'], thread['WaitTime']]])
+
+    return rows, threads
+
+
+def describe_filters(filters):
+    parts = []
+    if filters.get(FILTER_ACTIVE):
+        parts.append('active only')
+    if filters.get(FILTER_USER):
+        parts.append('user contains "{}"'.format(filters[FILTER_USER]))
+    if filters.get(FILTER_OBJECT):
+        parts.append('object contains "{}"'.format(filters[FILTER_OBJECT]))
+    if filters.get(FILTER_MIN_ELAPSED):
+        parts.append('elapsed at least {}s'.format(int(filters[FILTER_MIN_ELAPSED])))
+    return ', '.join(parts) or 'all threads'
+
+
+def get_renderer(view, columns):
+    return RENDERERS.setdefault(view.id(), ConsoleRenderer(columns))
+
+
+def drop_renderer(view_id):
+    RENDERERS.pop(view_id, None)
+
+
+class ConsoleRenderer:
+    def __init__(self, columns):
+        self.columns = columns
+        self.ids = []
+        self.cells = {}
+        self.widths = None
+        self.size = None
+        self.lengths = [Counter({len(column): 1}) for column in columns]
+
+    def render(self, view, edit, rows):
+        rows = [(key, tuple(str(value) for value in values)) for key, values in rows]
+        old_ids, old_cells = self.ids, self.cells
+        new_ids, new_cells = [key for key, _ in rows], dict(rows)
+
+        # Column widths follow the cell lengths that were added and removed, no need to rescan every row
+        for key in old_ids:
+            if new_cells.get(key) != old_cells[key]:
+                self._count(old_cells[key], -1)
+        for key in new_ids:
+            if old_cells.get(key) != new_cells[key]:
+                self._count(new_cells[key], 1)
+
+        self.ids, self.cells = new_ids, new_cells
+        widths = [max(lengths) for lengths in self.lengths]
+
+        # Any width change moves every line, and a panel that was cleared elsewhere has nothing to patch
+        if widths != self.widths or view.size() != self.size:
+            self.widths = widths
+            position = view.viewport_position()
+            view.replace(edit, sublime.Region(0, view.size()), self._table())
+            view.set_viewport_position(position, False)
+        else:
+            self._patch(view, edit, old_ids, old_cells)
+
+        self.size = view.size()
+
+    def _patch(self, view, edit, old_ids, old_cells):
+        matcher = difflib.SequenceMatcher(None, old_ids, self.ids, autojunk=False)
+
+        # Bottom up, so the line numbers of the rows above stay valid
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if tag == 'equal':
+                for offset in reversed(range(i2 - i1)):
+                    key = old_ids[i1 + offset]
+                    if old_cells[key] != self.cells[key]:
+                        line = view.line(view.text_point(HEADER_LINES + i1 + offset, 0))
+                        view.replace(edit, line, self._row(self.cells[key]))
+            else:
+                region = sublime.Region(view.text_point(HEADER_LINES + i1, 0), view.text_point(HEADER_LINES + i2, 0))
+                view.replace(edit, region, ''.join(self._row(self.cells[key]) + '\n' for key in self.ids[j1:j2]))
+
+    def _count(self, cells, change):
+        for lengths, cell in zip(self.lengths, cells):
+            lengths[len(cell)] += change
+            if not lengths[len(cell)]:
+                del lengths[len(cell)]
+
+    def _border(self):
+        return '+' + '+'.join('-' * (width + 2) for width in self.widths) + '+'
+
+    def _row(self, cells):
+        return '| ' + ' | '.join(cell.center(width) for cell, width in zip(cells, self.widths)) + ' |'
+
+    def _table(self):
+        lines = [self._border(), self._row(self.columns), self._border()]
+        lines += [self._row(self.cells[key]) for key in self.ids]
+        lines.append(self._border())
+        return '\n'.join(lines)
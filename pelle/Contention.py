@@ -0,0 +1,94 @@
+from prettytable import PrettyTable
+
+from pelle.Poller import elapsed_seconds
+
+TOP_ROWS = 15
+
+
+def is_waiting(thread):
+    return thread['State'] == 'Wait' or elapsed_seconds(thread['WaitTime']) > 0
+
+
+def holds_locks(thread):
+    return bool(thread['WLocks'] or thread['IXLocks'])
+
+
+def contention_report(snapshots):
+    # A wait is identified by its thread and object, the reported wait time grows until it is over
+    waits = {}
+    pairs = {}
+    for timestamp, threads in snapshots:
+        holders = {}
+        for thread in threads:
+            if not is_waiting(thread) and holds_locks(thread) and thread['ObjectName']:
+                holders.setdefault(thread['ObjectName'], []).append(thread)
+
+        for thread in threads:
+            if not is_waiting(thread):
+                continue
+
+            wait = elapsed_seconds(thread['WaitTime'])
+            key = (thread['ID'], thread['ObjectName'])
+            previous = waits.get(key)
+            if not previous or wait >= previous['wait']:
+                waits[key] = {'thread': thread, 'wait': wait, 'seen': timestamp}
+
+            # Whoever holds write or intent locks on the same object is the likely blocker
+            for holder in holders.get(thread['ObjectName'], []):
+                if holder['ID'] == thread['ID']:
+                    continue
+                pair = (holder['ID'], thread['ID'], thread['ObjectName'])
+                entry = pairs.setdefault(pair, {'blocker': holder, 'blocked': thread, 'snapshots': 0, 'wait': 0})
+                entry['snapshots'] += 1
+                entry['wait'] = max(entry['wait'], wait)
+
+    sections = [
+        'Lock contention over {} snapshots, {:.0f}s'.format(
+            len(snapshots), snapshots[-1][0] - snapshots[0][0] if snapshots else 0),
+        _totals('Wait time per object', 'Object', waits, lambda w: w['thread']['ObjectName'] or '(none)'),
+        _totals('Wait time per user', 'User', waits, lambda w: w['thread']['Name']),
+        _longest(waits),
+        _pairs(pairs),
+    ]
+    return '\n\n'.join(sections)
+
+
+def _table(columns):
+    table = PrettyTable(border=False)
+    table.field_names = columns
+    table.align = 'l'
+    table.max_width = 1000
+    return table
+
+
+def _totals(title, column, waits, key):
+    totals = {}
+    for wait in waits.values():
+        total = totals.setdefault(key(wait), {'wait': 0, 'waits': 0, 'threads': set()})
+        total['wait'] += wait['wait']
+        total['waits'] += 1
+        total['threads'].add(wait['thread']['ID'])
+
+    table = _table([column, 'Total Wait', 'Waits', 'Threads'])
+    for name, total in sorted(totals.items(), key=lambda item: -item[1]['wait'])[:TOP_ROWS]:
+        table.add_row([name, '{:.0f}s'.format(total['wait']), total['waits'], len(total['threads'])])
+    return '{}\n{}'.format(title, table.get_string())
+
+
+def _longest(waits):
+    table = _table(['ID', 'User', 'Object', 'Function', 'Wait', 'Locks R/IX/W'])
+    for wait in sorted(waits.values(), key=lambda w: -w['wait'])[:TOP_ROWS]:
+        thread = wait['thread']
+        table.add_row([thread['ID'], thread['Name'], thread['ObjectName'], thread['Function'],
+                       '{:.0f}s'.format(wait['wait']),
+                       '{}/{}/{}'.format(thread['RLocks'], thread['IXLocks'], thread['WLocks'])])
+    return 'Longest waiting threads\n{}'.format(table.get_string())
+
+
+def _pairs(pairs):
+    table = _table(['Blocker', 'Blocker User', 'Blocked', 'Blocked User', 'Object', 'Seen', 'Longest Wait'])
+    for entry in sorted(pairs.values(), key=lambda p: (-p['snapshots'], -p['wait']))[:TOP_ROWS]:
+        table.add_row([entry['blocker']['ID'], entry['blocker']['Name'], entry['blocked']['ID'],
+                       entry['blocked']['Name'], entry['blocked']['ObjectName'],
+                       '{} snapshots'.format(entry['snapshots']), '{:.0f}s'.format(entry['wait'])])
+    return 'Likely blocker and blocked threads, by object\n{}'.format(table.get_string())
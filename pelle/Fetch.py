@@ -0,0 +1,122 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ijson
+from TM1py.Utils import format_url
+
+DEFAULT_PULL_WORKERS = 4
+DEFAULT_PULL_SLICE_SIZE = 50
+DEFAULT_PULL_STREAMING = True
+
+PROCESS_SELECT = '$select=*,UIData,VariablesUIData,' \
+                 'DataSource/dataSourceNameForServer,' \
+                 'DataSource/dataSourceNameForClient,' \
+                 'DataSource/asciiDecimalSeparator,' \
+                 'DataSource/asciiDelimiterChar,' \
+                 'DataSource/asciiDelimiterType,' \
+                 'DataSource/asciiHeaderRecords,' \
+                 'DataSource/asciiQuoteCharacter,' \
+                 'DataSource/asciiThousandSeparator,' \
+                 'DataSource/view,' \
+                 'DataSource/query,' \
+                 'DataSource/userName,' \
+                 'DataSource/password,' \
+                 'DataSource/usesUnicode,' \
+                 'DataSource/subset'
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+PROCESSES_URL = '/api/v1/Processes?' + PROCESS_SELECT
+CUBES_URL = '/api/v1/Cubes?$select=Name,Rules&$expand=Dimensions($select=Name)'
+ERROR_LOG_URL = "/api/v1/ErrorLogFiles('{}')/Content"
+
+
+def slices(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def filter_clause(template, *args):
+    # format_url only escapes quotes, % and #. & and + would otherwise end up splitting the query string
+    return format_url(template, *args).replace('&', '%26').replace('+', '%2B')
+
+
+def name_filter(names):
+    return '$filter=' + ' or '.join(filter_clause("Name eq '{}'", name) for name in names)
+
+
+def stream_values(rest, url):
+    # Bypasses async requests mode, the response body has to be read off the socket as it arrives
+    url, _ = rest._url_and_body(url=url, data='')
+    response = rest._s.get(url, headers=rest._headers, verify=rest._verify, timeout=rest._timeout, stream=True)
+    try:
+        rest.verify_response(response=response)
+        response.raw.decode_content = True
+        for value in ijson.items(response.raw, 'value.item', use_float=True):
+            yield value
+    finally:
+        response.close()
+
+
+def download(rest, url, file, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    url, _ = rest._url_and_body(url=url, data='')
+    response = rest._s.get(url, headers=rest._headers, verify=rest._verify, timeout=rest._timeout, stream=True)
+
+    # Written in chunks as the body arrives, a rejected load can produce error logs of hundreds of megabytes
+    temp = file + '.tmp'
+    try:
+        rest.verify_response(response=response)
+        response.raw.decode_content = True
+        with open(temp, 'wb') as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+        os.replace(temp, file)
+    finally:
+        response.close()
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def download_error_log(rest, name, folder):
+    file = os.path.join(folder, name)
+    download(rest, format_url(ERROR_LOG_URL, name), file)
+    return file
+
+
+def get_values(rest, url, stream=True):
+    if stream:
+        return stream_values(rest, url)
+    return rest.GET(url).json()['value']
+
+
+def fetch_all(rest, url, handler, stream=True):
+    for value in get_values(rest, url, stream):
+        handler(value)
+
+
+def fetch_objects(rest, url, names, handler, workers=DEFAULT_PULL_WORKERS, slice_size=DEFAULT_PULL_SLICE_SIZE,
+                  progress=None, stream=True):
+    names = list(names)
+    if not names:
+        return
+
+    def fetch(names_slice):
+        for value in get_values(rest, '{}&{}'.format(url, name_filter(names_slice)), stream):
+            handler(value)
+        return len(names_slice)
+
+    done = 0
+    # Workers share the RestService session, and with it the HTTP connection pool. Objects are handed over
+    # as they are decoded, so nothing but the slices in flight is kept in memory
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        futures = [executor.submit(fetch, names_slice) for names_slice in slices(names, max(1, int(slice_size)))]
+        try:
+            for future in as_completed(futures):
+                done += future.result()
+                if progress:
+                    progress(done, len(names))
+        except BaseException:
+            # Don't start slices that are still queued once one has failed or the pull was cancelled
+            for future in futures:
+                future.cancel()
+            raise
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import statistics
+import threading
+
+from pelle import Cache
+
+DEFAULT_REGRESSION_WINDOW = 10
+DEFAULT_REGRESSION_FACTOR = 1.5
+MIN_REGRESSION_RUNS = 3
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    process TEXT NOT NULL,
+    parameters_hash TEXT NOT NULL,
+    parameters TEXT,
+    started REAL,
+    duration REAL,
+    status TEXT,
+    rows INTEGER,
+    regression INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_process ON runs (process, parameters_hash, started);
+'''
+
+HISTORIES = {}
+HISTORIES_LOCK = threading.Lock()
+
+
+def get_history(window):
+    project_file = window.project_file_name()
+    if not project_file:
+        return None
+
+    with HISTORIES_LOCK:
+        history = HISTORIES.get(project_file)
+        if not history:
+            history = RunHistory(os.path.splitext(Cache.cache_file(project_file))[0] + '-runs.sqlite')
+            HISTORIES[project_file] = history
+
+    return history
+
+
+def parameters_hash(parameters):
+    return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def row_count(messages):
+    # TM1 logs the records read from a data source when the data tab finishes
+    for message in messages:
+        match = re.search(r'(\d[\d,]*)\s+(?:records|rows)\b', message['Message'], re.IGNORECASE)
+        if match:
+            return int(match.group(1).replace(',', ''))
+    return None
+
+
+class RunHistory:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def record(self, process, parameters, started, duration, status, rows,
+               window=DEFAULT_REGRESSION_WINDOW, factor=DEFAULT_REGRESSION_FACTOR):
+        key = parameters_hash(parameters)
+
+        with self._lock, self._connection:
+            # Only successful runs with the same parameters make a fair baseline
+            previous = [row[0] for row in self._connection.execute(
+                'SELECT duration FROM runs WHERE process = ? AND parameters_hash = ? AND status = ? '
+                'ORDER BY started DESC LIMIT ?', (process, key, 'CompletedSuccessfully', window)).fetchall()]
+
+            median = statistics.median(previous) if len(previous) >= MIN_REGRESSION_RUNS else None
+            regression = bool(median and status == 'CompletedSuccessfully' and duration > median * factor)
+
+            self._connection.execute(
+                'INSERT INTO runs (process, parameters_hash, parameters, started, duration, status, rows, regression) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (process, key, json.dumps(parameters), started, duration, status, rows, int(regression)))
+
+        return median if regression else None
+
+    def processes(self):
+        with self._lock:
+            rows = self._connection.execute('SELECT DISTINCT process FROM runs ORDER BY process').fetchall()
+        return [row[0] for row in rows]
+
+    def runs(self, process, limit=DEFAULT_REGRESSION_WINDOW):
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT parameters, started, duration, status, rows, regression FROM runs WHERE process = ? '
+                'ORDER BY started DESC LIMIT ?', (process, limit)).fetchall()
+        return [{'parameters': json.loads(parameters), 'started': started, 'duration': duration, 'status': status,
+                 'rows': rows, 'regression': bool(regression)}
+                for parameters, started, duration, status, rows, regression in rows]
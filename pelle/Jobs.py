@@ -0,0 +1,93 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pelle import Utils
+
+JOBS = {}
+JOBS_LOCK = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, window, label):
+        self.window = window
+        self.label = label
+        self.error = None
+        self.done = threading.Event()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self.report('cancelling...')
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.label)
+
+    def report(self, message):
+        self.window.status_message('{}: {}'.format(self.label, message))
+
+    def run(self, target):
+        try:
+            target(self)
+        except JobCancelled:
+            self.report('cancelled')
+        except Exception as e:
+            self.error = e
+            traceback.print_exc()
+            self.report('failed with message: {}'.format(e))
+        finally:
+            self.done.set()
+
+
+def run_parallel(func, items, workers, progress=None):
+    items = list(items)
+    results = []
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        futures = [executor.submit(func, *item) for item in items]
+        try:
+            for future in as_completed(futures):
+                results.append(future.result())
+                if progress:
+                    progress(len(results), len(items))
+        except BaseException:
+            # Queued items are dropped once one has failed or the job was cancelled
+            for future in futures:
+                future.cancel()
+            raise
+
+    return results
+
+
+def start_job(key, window, label, target):
+    with JOBS_LOCK:
+        job = JOBS.get(key)
+        if job and not job.done.is_set():
+            job.report('already running, joined the running job')
+            return job
+
+        job = Job(window, label)
+        JOBS[key] = job
+
+    Utils.run_async(lambda: job.run(target))
+    return job
+
+
+def cancel_job(key):
+    with JOBS_LOCK:
+        job = JOBS.get(key)
+
+    if not job or job.done.is_set():
+        return False
+
+    job.cancel()
+    return True
@@ -0,0 +1,90 @@
+import glob
+import hashlib
+import json
+import os
+import traceback
+
+MANIFEST_FILE = '.tm1-sync.json'
+
+PROCESSES = 'processes'
+RULES = 'rules'
+
+
+def content_hash(content):
+    content = content.replace('\r\n', '\n').strip('\n') + '\n'
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class SyncManifest:
+    def __init__(self, folder):
+        self.path = os.path.join(folder, MANIFEST_FILE)
+        self.objects = {PROCESSES: {}, RULES: {}}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for kind in self.objects:
+                self.objects[kind] = data.get(kind, {})
+        except Exception:
+            # A corrupt manifest only costs a full pull
+            traceback.print_exc()
+
+    def save(self):
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.objects, f, indent=4, sort_keys=True)
+        os.replace(temp, self.path)
+
+    def get(self, kind, name):
+        return self.objects[kind].get(name)
+
+    def update(self, kind, name, last_updated, content_hash):
+        self.objects[kind][name] = {'last_updated': last_updated, 'hash': content_hash}
+
+    def remove(self, kind, name):
+        self.objects[kind].pop(name, None)
+
+    def diff(self, kind, remote, path_for):
+        entries = self.objects[kind]
+
+        changed = []
+        for name, last_updated in remote.items():
+            entry = entries.get(name)
+            if not entry or not last_updated or entry.get('last_updated') != last_updated:
+                changed.append(name)
+            elif entry.get('hash') and not os.path.exists(path_for(name)):
+                changed.append(name)
+
+        removed = [name for name in entries if name not in remote]
+
+        return changed, removed
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def modified(self, kind, folder, extension):
+        entries = self.objects[kind]
+
+        modified = []
+        untracked = []
+        for file in glob.glob(os.path.join(folder, '*' + extension)):
+            name = os.path.splitext(os.path.basename(file))[0]
+
+            # Files that were never pulled have no known server state to compare against
+            entry = entries.get(name)
+            if not entry:
+                untracked.append(file)
+                continue
+
+            with open(file, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            if entry.get('hash') != content_hash(content):
+                modified.append((name, file, content))
+
+        return modified, untracked
@@ -0,0 +1,64 @@
+import threading
+import time
+import traceback
+
+DEFAULT_MESSAGE_LOG_INTERVAL = 1
+
+
+class MessageLogTail:
+    def __init__(self, server_service, process_name, interval, on_messages):
+        self.server_service = server_service
+        self.marker = 'Process "{}"'.format(process_name)
+        self.interval = interval
+        self.on_messages = on_messages
+        self.thread_id = None
+        self.messages = []
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+        # The last entries of a run are logged shortly after the execute request returns
+        time.sleep(min(self.interval, 1) if self.interval > 0 else 1)
+        self.poll()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        if not self.server_service:
+            return
+
+        with self._lock:
+            try:
+                self._pending.extend(self.server_service.execute_message_log_delta_request())
+            except Exception:
+                traceback.print_exc()
+                return
+
+            # Entries are only attributed to the run once the thread that executes the process is known
+            if self.thread_id is None:
+                for message in self._pending:
+                    if self.marker in message['Message']:
+                        self.thread_id = message['ThreadID']
+                        break
+                else:
+                    return
+
+            messages = [m for m in self._pending if m['ThreadID'] == self.thread_id]
+            self._pending = []
+            self.messages.extend(messages)
+
+        if messages:
+            self.on_messages(messages)
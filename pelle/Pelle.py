@@ -1,22 +1,54 @@
+import itertools
 import json
 import os
 import re
 import tempfile
+import threading
 import time
 
 import glob
 import sublime
 import traceback
-from TM1py import TM1Service, Process, Cube, ServerService
-from TM1py.Exceptions import TM1pyException
+import uuid
+from TM1py import Process, Cube, ServerService, TM1Service
+from TM1py.Exceptions import TM1pyException, TM1pyRestException
+from TM1py.Utils import format_url
 from prettytable import PrettyTable
 
-from pelle import Utils
+from pelle import Cache, Fetch, History, Utils
+from pelle.Jobs import JobCancelled, run_parallel
+from pelle.Connection import SessionStore, acquire_connection, release_connection, DEFAULT_CONNECTION_CHECK_TTL, \
+    DEFAULT_KEEPALIVE_INTERVAL
+from pelle.MessageLog import MessageLogTail, DEFAULT_MESSAGE_LOG_INTERVAL
+from pelle.Batch import DEFAULT_BATCH_CONCURRENCY
+from pelle.Runs import ProcessRun, RunCancelled, DEFAULT_RUN_TIMEOUT
+from pelle.Manifest import SyncManifest, content_hash, PROCESSES, RULES
+from pelle.Writer import ProjectWriter
 
 SESSIONS = {}
+SESSIONS_LOCK = threading.RLock()
+SESSION_STORE = None
 
 TI_LOG_FOLDER = 'Turbo Integrator Logs'
 
+# Default pool_maxsize of requests' HTTPAdapter
+DEFAULT_CONNECTION_POOL_SIZE = 10
+
+DEFAULT_PUSH_WORKERS = 4
+
+DEFAULT_CACHE_REFRESH_INTERVAL = 300
+
+# Temporary cube local rule files are checked on
+RULE_CHECK_CUBE = 'zzPelleRuleCheck_{}'
+
+DEFAULT_ERROR_LOG_PREVIEW_LINES = 100
+
+MANIFEST_LOCK = threading.Lock()
+
+# Process properties a .pro file holds, DataSource is further limited to the settings present in the file
+PROCESS_FIELDS = ['PrologProcedure', 'MetadataProcedure', 'DataProcedure', 'EpilogProcedure', 'Parameters',
+                  'Variables', 'VariablesUIData', 'DataSource']
+
 
 def get_session(window, quiet=False):
     if not window.project_file_name():
@@ -28,16 +60,49 @@ def get_session(window, quiet=False):
     session_name = os.path.split(window.project_file_name())
     session_name = os.path.splitext(session_name[1])[0]
 
-    session = SESSIONS.get(session_name)
-    if not session:
-        session = PelleSession(window, session_name)
-        SESSIONS[session_name] = session
-    elif not session.is_connected():
-        session.connect()
+    # Commands and background cache refreshes can ask for the same session at once
+    with SESSIONS_LOCK:
+        session = SESSIONS.get(session_name)
+        if not session:
+            session = PelleSession(window, session_name)
+            SESSIONS[session_name] = session
+        elif not session.is_connected():
+            session.connect(reconnect=True)
 
     return session
 
 
+def get_session_store():
+    global SESSION_STORE
+    if not SESSION_STORE:
+        SESSION_STORE = SessionStore(os.path.join(Cache.cache_folder(), 'sessions.json'))
+    return SESSION_STORE
+
+
+def release_session(window):
+    if not window.project_file_name():
+        return
+
+    session_name = os.path.split(window.project_file_name())
+    session_name = os.path.splitext(session_name[1])[0]
+
+    # The session stays open for as long as another window still has the project open
+    others = [w for w in sublime.windows() if w.id() != window.id() and
+              w.project_file_name() == window.project_file_name()]
+
+    with SESSIONS_LOCK:
+        if others:
+            session = SESSIONS.get(session_name)
+            if session and session.window.id() == window.id():
+                session.window = others[0]
+            return
+
+        session = SESSIONS.pop(session_name, None)
+
+    if session:
+        session.close()
+
+
 class PelleSession:
     def __init__(self, window, name):
         self.window = window
@@ -46,7 +111,8 @@ class PelleSession:
         self.project_settings = window.project_data()
         self.plugin_settings = self.project_settings.get('settings', {})
         self.connection_settings = self.plugin_settings.get('tm1_connection')
-        self.tm1 = None
+        self.cache = Cache.get_cache(window)
+        self.connection = None
 
         # Legacy
         if not self.connection_settings:
@@ -58,86 +124,222 @@ class PelleSession:
                 'No TM1 connection settings. Please run TM1 Config Setup command from command palette')
             raise Exception()
 
-        self.connect()
+        settings = self.connection_settings.copy()
+        settings['password'] = Utils.decode(settings['password'])
+
+        # Parallel pulls share the session, so the HTTP connection pool needs a connection per worker
+        workers, _, _ = self._get_pull_settings()
+        if 'connection_pool_size' not in settings and workers > DEFAULT_CONNECTION_POOL_SIZE:
+            settings['connection_pool_size'] = workers
+
+        self.connection = acquire_connection(
+            settings,
+            self.plugin_settings.get('connection_check_ttl', DEFAULT_CONNECTION_CHECK_TTL),
+            self.plugin_settings.get('keepalive_interval', DEFAULT_KEEPALIVE_INTERVAL),
+            get_session_store() if self.plugin_settings.get('remember_session', False) else None)
+
+        try:
+            self.connect()
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def tm1(self):
+        return self.connection.tm1
 
-    def connect(self):
+    def connect(self, reconnect=False):
         try:
-            settings = self.connection_settings.copy()
-            settings['password'] = Utils.decode(settings['password'])
-            self.tm1 = TM1Service(**settings)
+            self.connection.connect(reconnect)
         except Exception as e:
             traceback.print_exc()
             sublime.message_dialog('Unable to establish TM1 session with message: \n\n' + str(e))
             raise
 
-    def refresh_objects(self):
+    def close(self):
+        if self.connection:
+            release_connection(self.connection)
+            self.connection = None
+
+    def refresh_objects(self, job):
         main_folder = self.project_settings['folders'][0]['path']
+        manifest = SyncManifest(main_folder)
+        writer = ProjectWriter()
+
+        # Clear legacy files from project folder
         existing = glob.glob(os.path.join(main_folder, '*.pro')) + \
                    glob.glob(os.path.join(main_folder, '*.rux'))
-
-        # Clear existing files from project folder
         for file in existing:
             try:
                 os.remove(file)
             except Exception:
                 traceback.print_exc()
 
-        # Get objects from server
-        cubes = self.tm1.cubes.get_all()
-        processes = self.tm1.processes.get_all()
-
-        # Write cube rules to files
-        folder = os.path.join(main_folder, 'rules')
-        if not os.path.exists(folder): os.mkdir(folder)
-        for cube in [x for x in cubes if x.has_rules]:
-            file = os.path.join(folder, cube.name + '.rux')
-            content = Utils.cube_rule_to_text(cube)
-            with open(file, 'w', encoding='utf-8') as f:
-                f.write(content)
-
-        # Write processes to files
-        folder = os.path.join(main_folder, 'processes')
-        if not os.path.exists(folder): os.mkdir(folder)
-        for process in processes:
-            file = os.path.join(folder, process.name + '.pro')
-            content = Utils.process_to_text(process)
-            with open(file, 'w', encoding='utf-8') as f:
-                f.write(content)
-
-        self.project_settings['completions'] = {}
-
-        # Populate Rule completions
-        completions = [Utils.generate_rule_completion(cube) for cube in cubes]
-        self.project_settings['completions']['source.tm1.rule'] = completions
-
-        # Populate TI completions
-        completions = [Utils.generate_turbo_integrator_completion(process) for process in processes] + \
-                      [Utils.generate_turbo_integrator_cube_completion(cube, 'CELLGETN') for cube in cubes] + \
-                      [Utils.generate_turbo_integrator_cube_completion(cube, 'CELLPUTN') for cube in cubes] + \
-                      [Utils.generate_turbo_integrator_cube_completion(cube, 'CELLINCREMENTN') for cube in cubes] + \
-                      [Utils.generate_turbo_integrator_cube_completion(cube, 'CELLGETS') for cube in cubes] + \
-                      [Utils.generate_turbo_integrator_cube_completion(cube, 'CELLPUTS') for cube in cubes] + \
-                      [Utils.generate_turbo_integrator_cube_locals_completion(cube) for cube in cubes]
-
-        self.project_settings['completions']['source.tm1.ti'] = completions
-
-        self.window.set_project_data(self.project_settings)
-
-    def update_object(self, view):
+        rule_folder = os.path.join(main_folder, 'rules')
+        if not os.path.exists(rule_folder): os.mkdir(rule_folder)
+
+        process_folder = os.path.join(main_folder, 'processes')
+        if not os.path.exists(process_folder): os.mkdir(process_folder)
+
+        def rule_file(name):
+            return os.path.join(rule_folder, name + '.rux')
+
+        def process_file(name):
+            return os.path.join(process_folder, name + '.pro')
+
+        # Get names and timestamps from server
+        job.report('listing objects on server')
+        cube_stamps = self._get_cube_stamps()
+        process_stamps = self._get_process_stamps()
+        self._update_cache(cube_stamps, process_stamps)
+        job.check_cancelled()
+
+        cubes = [Cube(name=c['Name'], dimensions=[d['Name'] for d in c['Dimensions']]) for c in cube_stamps]
+        processes = [Process(name=p['Name'], parameters=p['Parameters']) for p in process_stamps]
+
+        # Files written before a cancel or failure are still recorded, so the next pull picks up from there
+        try:
+            # Write changed cube rules to files
+            remote_cubes = {c['Name']: c.get('LastSchemaUpdate') for c in cube_stamps}
+            changed, removed = manifest.diff(RULES, remote_cubes, rule_file)
+
+            def write_rule(cube):
+                job.check_cancelled()
+                if cube.has_rules:
+                    content = Utils.cube_rule_to_text(cube)
+                    writer.write(rule_file(cube.name), content)
+                    manifest.update(RULES, cube.name, remote_cubes[cube.name], content_hash(content))
+                else:
+                    writer.delete(rule_file(cube.name))
+                    manifest.update(RULES, cube.name, remote_cubes[cube.name], None)
+
+            self._pull_objects(job, changed, len(remote_cubes), Fetch.CUBES_URL, Cube.from_dict, write_rule,
+                               'cube rules')
+
+            for name in removed:
+                writer.delete(rule_file(name))
+                manifest.remove(RULES, name)
+
+            # Write changed processes to files
+            remote_processes = {p['Name']: p.get('LastUpdated') for p in process_stamps}
+            changed, removed = manifest.diff(PROCESSES, remote_processes, process_file)
+
+            def write_process(process):
+                job.check_cancelled()
+                content = Utils.process_to_text(process)
+                writer.write(process_file(process.name), content)
+                manifest.update(PROCESSES, process.name, remote_processes[process.name], content_hash(content))
+
+            self._pull_objects(job, changed, len(remote_processes), Fetch.PROCESSES_URL, Process.from_dict,
+                               write_process, 'processes')
+
+            for name in removed:
+                writer.delete(process_file(name))
+                manifest.remove(PROCESSES, name)
+        finally:
+            manifest.save()
+
+        completions = Utils.generate_completions(cubes, processes)
+
+        def apply_completions():
+            self._update_project_data('completions', completions)
+
+        # Project data can only be applied once, from the main thread
+        sublime.set_timeout(apply_completions)
+
+        job.report('pulled objects from server, {}'.format(writer.summary()))
+
+    def refresh_process_cache(self):
+        # The process picker opens often, the list is fetched again only once it is older than the interval
+        interval = float(self.plugin_settings.get('cache_refresh_interval', DEFAULT_CACHE_REFRESH_INTERVAL))
+        age = self.cache.age(Cache.PROCESS)
+        if age is not None and age < interval:
+            return
+
+        self._update_process_cache(self._get_process_stamps())
+
+    def _update_cache(self, cube_stamps, process_stamps):
+        self.cache.replace(Cache.CUBE, {c['Name']: {'dimensions': [d['Name'] for d in c['Dimensions']]}
+                                        for c in cube_stamps})
+        self._update_process_cache(process_stamps)
+
+    def _update_process_cache(self, process_stamps):
+        self.cache.replace(Cache.PROCESS, {p['Name']: {'parameters': p['Parameters']} for p in process_stamps})
+
+    def _get_cube_stamps(self):
+        try:
+            response = self.tm1._tm1_rest.GET(
+                '/api/v1/Cubes?$select=Name,LastSchemaUpdate&$expand=Dimensions($select=Name)')
+        except TM1pyRestException:
+            # LastSchemaUpdate is not available on older servers, every cube is then treated as changed
+            response = self.tm1._tm1_rest.GET('/api/v1/Cubes?$select=Name&$expand=Dimensions($select=Name)')
+        return response.json()['value']
+
+    def _get_process_stamps(self):
+        try:
+            response = self.tm1._tm1_rest.GET('/api/v1/Processes?$select=Name,LastUpdated,Parameters')
+        except TM1pyRestException:
+            # LastUpdated is not available on older servers, every process is then treated as changed
+            response = self.tm1._tm1_rest.GET('/api/v1/Processes?$select=Name,Parameters')
+        return response.json()['value']
+
+    def _pull_objects(self, job, names, total, url, from_dict, handler, label):
+        if not names:
+            return
+
+        workers, slice_size, stream = self._get_pull_settings()
+
+        def progress(done, count):
+            job.report('pulling {} from server: {}/{}'.format(label, done, count))
+
+        def handle(value):
+            handler(from_dict(value))
+
+        # A single bulk request beats sliced requests once most of the model has changed
+        if workers <= 1 and len(names) > total / 2:
+            changed = set(names)
+            done = [0]
+
+            def handle_changed(value):
+                if value['Name'] in changed:
+                    handle(value)
+                    done[0] += 1
+                    progress(done[0], len(changed))
+
+            Fetch.fetch_all(self.tm1._tm1_rest, url, handle_changed, stream)
+        else:
+            Fetch.fetch_objects(self.tm1._tm1_rest, url, names, handle, workers, slice_size, progress, stream)
+
+    def _get_pull_settings(self):
+        workers = int(self.plugin_settings.get('pull_workers', Fetch.DEFAULT_PULL_WORKERS))
+        slice_size = int(self.plugin_settings.get('pull_slice_size', Fetch.DEFAULT_PULL_SLICE_SIZE))
+        stream = bool(self.plugin_settings.get('pull_streaming', Fetch.DEFAULT_PULL_STREAMING))
+        return workers, slice_size, stream
+
+    def update_object(self, view, force=False):
         file = os.path.basename(view.file_name())
         file, ext = os.path.splitext(file)
 
         view.run_command("save")
         view.erase_regions('error')
 
-        if ext == '.rux':
-            self._update_rule(view)
-        elif ext == '.pro':
-            self._update_process(view)
-        else:
+        kind = {'.rux': RULES, '.pro': PROCESSES}.get(ext)
+        if not kind:
             sublime.message_dialog('This operation can only be performed for .rux and .pro files')
             return
 
+        # Unchanged content would only cost an upload, and a recompile of the rules on the server
+        content = view.substr(sublime.Region(0, view.size()))
+        entry = self._get_manifest().get(kind, file)
+        if not force and entry and entry.get('hash') == content_hash(content):
+            sublime.status_message('{} is unchanged since the last sync, nothing to push'.format(file))
+            return
+
+        if kind == RULES:
+            self._update_rule(view)
+        else:
+            self._update_process(view)
+
     def _update_rule(self, view):
         file = os.path.basename(view.file_name())
         file, ext = os.path.splitext(file)
@@ -158,8 +360,9 @@ class PelleSession:
             self.tm1.cubes.update(cube)
             errors = self.tm1.cubes.check_rules(cube.name)
             if errors:
-                Utils.highlight_errors(view, errors[0]['Message'], errors[0]['LineNumber'], None)
+                Utils.highlight_errors(view, errors)
             else:
+                self._record_push(RULES, cube.name, content)
                 sublime.message_dialog('Updated {} Rule Successfully'.format(cube.name))
 
         Utils.run_async(do_rule_update)
@@ -170,24 +373,193 @@ class PelleSession:
 
         sublime.status_message('Processing server update of TI process: {}'.format(file))
 
-        try:
-            process = self.tm1.processes.get(file)
-        except TM1pyException:
-            process = Process(name=file)
-
-        process = Utils.view_to_process(view, process)
+        # The process is built from the buffer alone, the server copy is never fetched
+        timer = Utils.StepTimer()
+        content = view.substr(sublime.Region(0, view.size()))
+        process = timer.time('parse', Utils.text_to_process, content, Process(name=file))
 
         def do_process_update():
-            self.tm1.processes.update_or_create(process)
-            errors = self.tm1.processes.compile(file)
+            errors = self._push_process(process, content, timer)
+
+            sublime.status_message('TI process {}: {}'.format(file, timer))
+
             if errors:
-                Utils.highlight_errors(view, errors[0]['Message'], errors[0]['LineNumber'], errors[0]['Procedure'])
+                Utils.highlight_errors(view, errors)
             else:
+                self._record_push(PROCESSES, file, content)
                 sublime.message_dialog('Updated {} TI Process Successfully'.format(file))
 
         Utils.run_async(do_process_update)
 
+    def _push_process(self, process, content, timer):
+        # Validate the unbound process before anything is written to the server
+        try:
+            errors = timer.time('compile', self.tm1.processes.compile_process, process)
+        except TM1pyRestException:
+            # CompileProcess is not available on older servers, compile after the update instead
+            errors = None
+
+        if not errors:
+            timer.time('update', self._upsert_process, process, Utils.datasource_fields(content))
+            # The run prompt reads parameters from the cache, which is otherwise only refreshed by a pull
+            self.cache.update(Cache.PROCESS, process.name, {'parameters': process.parameters})
+
+        if errors is None:
+            errors = timer.time('compile', self.tm1.processes.compile, process.name)
+
+        return errors
+
+    def _upsert_process(self, process, datasource_fields):
+        if int(self.tm1.processes.version[0:2]) < 11:
+            process.drop_parameter_types()
+
+        # Only what the file holds is sent, anything else keeps its server value instead of the TM1py default
+        body = json.loads(process.body)
+        body = {key: body[key] for key in PROCESS_FIELDS}
+        body['DataSource'] = {key: value for key, value in body['DataSource'].items() if key in datasource_fields}
+
+        try:
+            self.tm1._tm1_rest.PATCH(format_url("/api/v1/Processes('{}')", process.name),
+                                     json.dumps(body, ensure_ascii=False))
+        except TM1pyRestException as e:
+            if e.status_code != 404:
+                raise
+            self.tm1.processes.create(process)
+
+    def _get_manifest(self):
+        return SyncManifest(self.project_settings['folders'][0]['path'])
+
+    def _record_push(self, kind, name, content):
+        # The server timestamp is left alone, the next pull still refreshes the file from the server copy
+        with MANIFEST_LOCK:
+            manifest = self._get_manifest()
+            entry = manifest.get(kind, name) or {}
+            manifest.update(kind, name, entry.get('last_updated'), content_hash(content))
+            manifest.save()
+
+    def push_changed_objects(self, job):
+        main_folder = self.project_settings['folders'][0]['path']
+        manifest = self._get_manifest()
+
+        # Without a manifest every file would look changed, and the whole tree would overwrite the server
+        if not manifest.exists():
+            sublime.message_dialog('There is no record of the last pull in this project.\n\n'
+                                   'Run TM1: Get - Pull Objects from Server before pushing changed objects')
+            return []
+
+        # Only files whose content differs from the last pulled or pushed content
+        rules, untracked_rules = manifest.modified(RULES, os.path.join(main_folder, 'rules'), '.rux')
+        processes, untracked_processes = manifest.modified(PROCESSES, os.path.join(main_folder, 'processes'), '.pro')
+        untracked = len(untracked_rules) + len(untracked_processes)
+        skipped = ', skipped {} files that were never pulled'.format(untracked) if untracked else ''
+
+        total = len(rules) + len(processes)
+        if not total:
+            job.report('no changed objects to push{}'.format(skipped))
+            return []
+
+        errors = []
+
+        def push_rule(name, file, content):
+            job.check_cancelled()
+            content = content.replace('\r\n', '\n').strip('\n') + '\n'
+            self._patch_rules(name, content)
+            rule_errors = self.tm1.cubes.check_rules(name)
+            for error in rule_errors:
+                errors.append((name, file, error['LineNumber'] - 1, error['Message']))
+            return rule_errors
+
+        def push_process(name, file, content):
+            job.check_cancelled()
+            process = Utils.text_to_process(content, Process(name=name))
+            process_errors = self._push_process(process, content, Utils.StepTimer())
+            sections = Utils.section_lines(content)
+            for error in process_errors:
+                line = Utils.error_line(sections, error['LineNumber'], error['Procedure'])
+                errors.append((name, file, line, error['Message']))
+            return process_errors
+
+        def push(kind, pusher, name, file, content):
+            try:
+                if not pusher(name, file, content):
+                    entry = manifest.get(kind, name) or {}
+                    manifest.update(kind, name, entry.get('last_updated'), content_hash(content))
+            except JobCancelled:
+                raise
+            except Exception as e:
+                traceback.print_exc()
+                errors.append((name, file, 0, str(e)))
+
+        def progress(done, count):
+            job.report('pushing changed objects to server: {}/{}'.format(done, count))
+
+        workers = int(self.plugin_settings.get('push_workers', DEFAULT_PUSH_WORKERS))
+        try:
+            run_parallel(push, [(RULES, push_rule) + rule for rule in rules] +
+                         [(PROCESSES, push_process) + process for process in processes], workers, progress)
+        finally:
+            with MANIFEST_LOCK:
+                manifest.save()
+
+        failed = len(set(error[1] for error in errors))
+        job.report('pushed {} changed objects, {} with errors{}'.format(total - failed, failed, skipped))
+
+        return sorted(errors)
+
+    def check_all_rules(self, job):
+        main_folder = self.project_settings['folders'][0]['path']
+        manifest = self._get_manifest()
+        files = sorted(glob.glob(os.path.join(main_folder, 'rules', '*.rux')))
+
+        def check(file):
+            job.check_cancelled()
+            name = os.path.splitext(os.path.basename(file))[0]
+            with open(file, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            # CheckRules only validates rules stored on the server, local changes are checked on a scratch copy
+            entry = manifest.get(RULES, name)
+            try:
+                if entry and entry.get('hash') == content_hash(content):
+                    errors = self.tm1.cubes.check_rules(name)
+                else:
+                    errors = self._check_rules_copy(name, content.replace('\r\n', '\n').strip('\n') + '\n')
+            except TM1pyRestException as e:
+                if e.status_code != 404:
+                    raise
+                return [(name, file, 0, 'Cube does not exist on the server')]
+
+            return [(name, file, error['LineNumber'] - 1, error['Message']) for error in errors]
+
+        def progress(done, count):
+            job.report('checking rules: {}/{}'.format(done, count))
+
+        workers, _, _ = self._get_pull_settings()
+        results = run_parallel(check, [(file,) for file in files], workers, progress)
+
+        errors = sorted(error for result in results for error in result)
+        job.report('checked {} rules, {} with errors'.format(len(files), len(set(error[1] for error in errors))))
+
+        return errors
+
+    def _check_rules_copy(self, cube_name, rules):
+        # An empty cube over the same dimensions, the rules of the real cube are never touched
+        dimensions = self.tm1.cubes.get_dimension_names(cube_name)
+        scratch = Cube(name=RULE_CHECK_CUBE.format(uuid.uuid4().hex[:8]), dimensions=dimensions)
+
+        self.tm1.cubes.create(scratch)
+        try:
+            self._patch_rules(scratch.name, rules)
+            return self.tm1.cubes.check_rules(scratch.name)
+        finally:
+            self.tm1.cubes.delete(scratch.name)
+
+    def _patch_rules(self, cube_name, rules):
+        self.tm1._tm1_rest.PATCH(format_url("/api/v1/Cubes('{}')", cube_name),
+                                 json.dumps({'Rules': rules}, ensure_ascii=False))
+
     def run_process(self, name, parameters):
+        server_service = None
         try:
             session_id = json.loads(self.tm1._tm1_rest.GET('/api/v1/ActiveSession').text).get('ID')
             server_service = ServerService(self.tm1._tm1_rest)
@@ -197,6 +569,7 @@ class PelleSession:
 
         # Create Output Window
         output = self.window.create_output_panel(name)
+        output.settings().set('result_file_regex', r'^Full error log: (.+)$')
         output.run_command('erase_view')
 
         self.window.run_command("show_panel", {"panel": "output." + name})
@@ -223,29 +596,45 @@ class PelleSession:
 
         output.run_command('append', {'characters': '\n'.join(ot)})
 
+        run = self._new_run(self.tm1._tm1_rest, name, parameters)
+
+        def append_messages(messages):
+            run.thread_id = tail.thread_id
+            output.run_command('append', {'characters': ''.join(
+                '\n{} {} {}'.format(m['TimeStamp'], m['Level'], m['Message']) for m in messages)})
+
+        interval = float(self.plugin_settings.get('message_log_interval', DEFAULT_MESSAGE_LOG_INTERVAL))
+        tail = MessageLogTail(server_service, name, interval, append_messages)
+
         def do_run_process():
+            message = None
+            status = 'Failed'
+            tail.start()
             try:
-                success, status, _ = self.tm1.processes.execute_with_return(name, **parameters)
+                status, _ = run.execute()
                 message = 'Process completed with status: ' + status
-                with open(os.path.join(folder, '_run.txt'), 'a') as f:
-                    f.write('\n\n' + message)
-                output.run_command('append', {'characters': '\n\n' + message})
+            except RunCancelled as e:
+                status = 'Cancelled'
+                message = 'Process cancelled: {}'.format(e)
             except Exception:
                 traceback.print_exc()
+            finally:
+                tail.stop()
 
-            time.sleep(1)
-            messages = server_service.execute_message_log_delta_request()
+            median = self._record_run(run, status, tail.messages)
+            if median:
+                message = '{}\n\nPossible regression: took {:.1f}s, the median of recent runs is {:.1f}s'.format(
+                    message, run.elapsed, median)
 
-            # Find ThreadID of this execution
-            thread_id = None
-            for message in reversed(messages):
-                if 'Process "{}"'.format(name) in message['Message']:
-                    thread_id = message['ThreadID']
+            if message:
+                with open(os.path.join(folder, '_run.txt'), 'a') as f:
+                    f.write('\n\n' + message)
+                output.run_command('append', {'characters': '\n\n' + message})
 
-            if not thread_id:
+            if not tail.thread_id:
                 raise Exception('Unable to find thread_id')
 
-            messages = [m for m in messages if m['ThreadID'] == thread_id]
+            messages = tail.messages
 
             columns = ['TimeStamp', 'Level', 'Logger', 'Message']
 
@@ -259,24 +648,128 @@ class PelleSession:
             with open(os.path.join(folder, '_tm1server.log'), 'w') as f:
                 f.write(table.get_string())
 
+            error_files = []
             for message in messages:
                 match = re.search(r'(TM1ProcessError)(.*)(.log)', message['Message'])
-                if match:
-                    error_file = match.group(0)
-                    try:
-                        content = self.tm1.processes.get_error_log_file_content(error_file)
-                        with open(os.path.join(folder, error_file), 'w', encoding='utf-8') as f:
-                            f.write(content)
-                    except Exception:
-                        traceback.print_exc()
+                if match and match.group(0) not in error_files:
+                    error_files.append(match.group(0))
+
+            def download_error_log(error_file):
+                try:
+                    return Fetch.download_error_log(self.tm1._tm1_rest, error_file, folder)
+                except Exception:
+                    traceback.print_exc()
+                    return None
+
+            workers, _, _ = self._get_pull_settings()
+            files = run_parallel(download_error_log, [(error_file,) for error_file in error_files], workers)
+
+            preview_lines = int(self.plugin_settings.get('error_log_preview_lines', DEFAULT_ERROR_LOG_PREVIEW_LINES))
+            for file in sorted(file for file in files if file):
+                with open(file, 'r', encoding='utf-8', errors='replace') as f:
+                    lines = list(itertools.islice(f, preview_lines + 1))
+
+                text = '\n\n{}\n{}'.format(os.path.basename(file), ''.join(lines[:preview_lines]).rstrip('\n'))
+                if len(lines) > preview_lines:
+                    text += '\n... showing the first {} lines'.format(preview_lines)
+                output.run_command('append', {'characters': text + '\nFull error log: {}'.format(file)})
 
         Utils.run_async(do_run_process)
 
+    def run_batch(self, job, batch_jobs, concurrency=None):
+        if concurrency is None:
+            concurrency = self.plugin_settings.get('batch_concurrency', DEFAULT_BATCH_CONCURRENCY)
+
+        run_time = time.localtime()
+        folder = self._get_output_directory('Batch', run_time)
+
+        # Every worker logs in with its own TM1 session, so the processes really run side by side
+        services = []
+        local = threading.local()
+
+        def get_service():
+            if not getattr(local, 'tm1', None):
+                local.tm1 = TM1Service(**self.connection.settings)
+                services.append(local.tm1)
+            return local.tm1
+
+        def run(index, name, parameters):
+            job.check_cancelled()
+            process_run, status, error_file = None, 'Not started', ''
+            start = time.perf_counter()
+            try:
+                process_run = self._new_run(get_service()._tm1_rest, name, parameters)
+                status, error_file = process_run.execute()
+                if error_file:
+                    Fetch.download_error_log(get_service()._tm1_rest, error_file, folder)
+            except RunCancelled:
+                status = 'Cancelled'
+            except Exception as e:
+                traceback.print_exc()
+                status = 'Failed: {}'.format(e)
+
+            regression = bool(process_run and process_run.finished and self._record_run(process_run, status))
+            return index, name, parameters, status, time.perf_counter() - start, error_file or '', regression
+
+        def progress(done, count):
+            job.report('ran {}/{} processes'.format(done, count))
+
+        try:
+            results = run_parallel(run, [(i,) + batch_job for i, batch_job in enumerate(batch_jobs)], concurrency,
+                                   progress)
+        finally:
+            for tm1 in services:
+                try:
+                    tm1.logout()
+                except Exception:
+                    traceback.print_exc()
+
+        table = PrettyTable(border=False)
+        table.field_names = ['Process', 'Parameters', 'Status', 'Duration', 'Error Log']
+        table.align = 'l'
+        table.max_width = 1000
+        for _, name, parameters, status, duration, error_file, regression in sorted(results, key=lambda r: r[0]):
+            parameters = ', '.join('{}={}'.format(k, v) for k, v in parameters.items())
+            if regression:
+                status += ' (slower than usual)'
+            table.add_row([name, parameters, status, '{:.1f}s'.format(duration), error_file])
+
+        summary = '\n'.join([
+            'Batch Run Time: ' + time.strftime('%a, %d %b %Y %H:%M:%S', run_time),
+            'Concurrency   : {}'.format(concurrency),
+            '',
+            table.get_string()])
+
+        with open(os.path.join(folder, '_batch.txt'), 'w') as f:
+            f.write(summary)
+
+        failed = len([r for r in results if r[3] != 'CompletedSuccessfully'])
+        job.report('ran {} processes, {} not completed successfully'.format(len(results), failed))
+
+        return summary
+
+    def _record_run(self, run, status, messages=()):
+        history = History.get_history(self.window)
+        if not history:
+            return None
+
+        try:
+            return history.record(run.name, run.parameters, run.started, run.elapsed, status,
+                                  History.row_count(messages),
+                                  int(self.plugin_settings.get('regression_window', History.DEFAULT_REGRESSION_WINDOW)),
+                                  float(self.plugin_settings.get('regression_factor',
+                                                                 History.DEFAULT_REGRESSION_FACTOR)))
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def _new_run(self, rest, name, parameters):
+        return ProcessRun(rest, name, parameters, float(self.plugin_settings.get('run_timeout', DEFAULT_RUN_TIMEOUT)))
+
     def clear_turbo_integrator_logs(self):
-        folders = self.project_settings.get('folders', [])
+        folders = (self.window.project_data() or {}).get('folders', [])
         folders = [f for f in folders if os.path.exists(f['path']) and f.get('name', '') != TI_LOG_FOLDER]
-        self.project_settings['folders'] = folders
-        sublime.active_window().set_project_data(self.project_settings)
+        self._update_project_data('folders', folders)
 
     def _get_output_directory(self, name, run_time):
         path = self._get_temp_dir(TI_LOG_FOLDER)
@@ -286,21 +779,24 @@ class PelleSession:
         return folder
 
     def _get_temp_dir(self, name):
-        folders = self.project_settings['folders']
+        folders = (self.window.project_data() or {}).get('folders', [])
         folders = [f for f in folders if os.path.exists(f['path'])]
         folder = [f for f in folders if f.get('name', '') == name]
         if not folder:
             path = tempfile.mkdtemp(prefix='sublime-tm1-ti-logs-')
             folders.append({'name': name, 'path': path})
-            self.project_settings['folders'] = folders
-            sublime.active_window().set_project_data(self.project_settings)
+            self._update_project_data('folders', folders)
         else:
             path = folder[0].get('path')
 
         return path
 
+    def _update_project_data(self, key, value):
+        # Settings changed since the session was created, like the console filter, must survive the write back
+        project_data = self.window.project_data() or {}
+        project_data[key] = value
+        self.window.set_project_data(project_data)
+        self.project_settings[key] = value
+
     def is_connected(self):
-        try:
-            return self.tm1._tm1_rest.is_connected()
-        except TM1pyException:
-            return False
+        return self.connection.is_connected()
@@ -0,0 +1,184 @@
+import re
+import threading
+import time
+import traceback
+from collections import deque
+
+from pelle.Console import FILTER_ACTIVE, SESSION_COLUMNS, SESSIONS_URL, THREAD_COLUMNS, contention_url, drop_renderer, \
+    session_rows, threads_url, user_name
+from pelle.Pelle import get_session
+
+CONSOLE_PANEL = 'Console'
+SESSIONS_PANEL = 'Sessions'
+DEFAULT_REFRESH = 2.5
+
+# Polls slow down to this multiple of the refresh time while nothing changes on the server
+MAX_BACKOFF = 8
+LONG_RUNNING_SECONDS = 10
+HIDDEN_CHECK_INTERVAL = 1
+
+# Snapshots kept for the lock contention report, ten minutes at the default refresh time
+DEFAULT_HISTORY_SIZE = 240
+
+POLLERS = {}
+POLLERS_LOCK = threading.Lock()
+
+
+def subscribe_console(key, window, view, panel=CONSOLE_PANEL, refresh_time=DEFAULT_REFRESH,
+                      history_size=DEFAULT_HISTORY_SIZE):
+    with POLLERS_LOCK:
+        poller = POLLERS.get(key)
+        if not poller:
+            poller = ConsolePoller(key, refresh_time, history_size)
+            POLLERS[key] = poller
+        poller.views[view.id()] = (window, view, panel)
+        poller.start()
+
+    poller.wake()
+    return poller
+
+
+def get_poller(key):
+    with POLLERS_LOCK:
+        return POLLERS.get(key)
+
+
+def wake_consoles():
+    with POLLERS_LOCK:
+        pollers = list(POLLERS.values())
+    for poller in pollers:
+        poller.wake()
+
+
+def elapsed_seconds(duration):
+    # Threads report their elapsed time as an ISO 8601 duration like P0DT01H02M03S
+    match = re.match(r'P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?', duration or '')
+    if not match:
+        return 0
+    days, hours, minutes, seconds = (float(group or 0) for group in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+class ConsolePoller:
+    def __init__(self, key, refresh_time, history_size=DEFAULT_HISTORY_SIZE):
+        self.key = key
+        self.history = deque(maxlen=int(history_size))
+        self.refresh_time = float(refresh_time)
+        self.interval = self.refresh_time
+        self.views = {}
+        self._snapshot = None
+        self._thread = None
+        self._wake = threading.Event()
+
+    def start(self):
+        if not self._thread:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._snapshot = None
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            with POLLERS_LOCK:
+                # Renderers of closed panels hold a full row snapshot
+                for key in [key for key, entry in self.views.items() if not entry[1].is_valid()]:
+                    drop_renderer(key)
+                    del self.views[key]
+                if not self.views:
+                    POLLERS.pop(self.key, None)
+                    self._thread = None
+                    return
+                visible = [(window, view, panel) for window, view, panel in self.views.values()
+                           if window.active_panel() == 'output.' + panel]
+
+            if visible:
+                try:
+                    self._poll(visible)
+                except Exception:
+                    traceback.print_exc()
+                    self.interval = self.refresh_time * MAX_BACKOFF
+                wait = self.interval
+            else:
+                # Nothing is requested from the server until a console is shown again
+                self._snapshot = None
+                wait = HIDDEN_CHECK_INTERVAL
+
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def _poll(self, visible):
+        rest = get_session(visible[0][0], quiet=True).tm1._tm1_rest
+
+        consoles = [(w, v) for w, v, panel in visible if panel == CONSOLE_PANEL]
+        threads, snapshot = self._poll_threads(rest, consoles)
+        session_threads = self._poll_sessions(rest, [v for w, v, panel in visible if panel == SESSIONS_PANEL])
+
+        # Lock holders could be missing from a filtered console, the report then gets the few threads it looks at
+        if session_threads is not None:
+            snapshot = session_threads
+        elif snapshot is None and consoles:
+            snapshot = self._get_threads(rest, contention_url())
+        if snapshot is not None:
+            self.history.append((time.time(), snapshot))
+
+        self._adapt(threads + (session_threads or []))
+
+    def _get_threads(self, rest, url):
+        threads = rest.GET(url).json()['value']
+        for thread in threads:
+            thread['Name'] = user_name(thread['Name'])
+        return threads
+
+    def _poll_threads(self, rest, consoles):
+        if not consoles:
+            return [], None
+
+        # Consoles with the same filters share one request
+        urls = {}
+        for window, view in consoles:
+            filters = (window.project_data() or {}).get('settings', {}).get('console_filter', {})
+            urls.setdefault(threads_url(filters), []).append(view)
+
+        # Idle threads hold no locks, a console showing all active threads already has what the report needs
+        complete = [threads_url({}), threads_url({FILTER_ACTIVE: True})]
+
+        threads = []
+        snapshot = None
+        for url, views in urls.items():
+            values = self._get_threads(rest, url)
+            threads += values
+            if url in complete:
+                snapshot = values
+
+            rows = [[row['ID'], [row[c] for c in THREAD_COLUMNS]] for row in values]
+            for view in views:
+                view.run_command('refresh_tm1_ops_console', {'rows': rows})
+
+        return threads, snapshot
+
+    def _poll_sessions(self, rest, views):
+        if not views:
+            return None
+
+        # Sessions, their users and their threads come back from one expanded request
+        rows, threads = session_rows(rest.GET(SESSIONS_URL).json()['value'], elapsed_seconds)
+        for view in views:
+            view.run_command('refresh_tm1_ops_console', {'rows': rows, 'columns': SESSION_COLUMNS})
+
+        return threads
+
+    def _adapt(self, threads):
+        snapshot = sorted((t['ID'], t['State'], t['Function'], t['ObjectName']) for t in threads)
+        long_running = any(t['State'] != 'Idle' and elapsed_seconds(t['ElapsedTime']) >= LONG_RUNNING_SECONDS
+                           for t in threads)
+
+        if long_running:
+            self.interval = self.refresh_time / 2
+        elif snapshot != self._snapshot:
+            self.interval = self.refresh_time
+        else:
+            self.interval = min(self.interval * 1.5, self.refresh_time * MAX_BACKOFF)
+
+        self._snapshot = snapshot
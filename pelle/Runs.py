@@ -0,0 +1,107 @@
+import itertools
+import json
+import threading
+import time
+
+from TM1py.Utils import format_url
+
+RUNS = {}
+RUNS_LOCK = threading.Lock()
+RUN_IDS = itertools.count(1)
+
+DEFAULT_RUN_TIMEOUT = 0
+
+
+class RunCancelled(Exception):
+    pass
+
+
+class ProcessRun:
+    def __init__(self, rest, name, parameters, timeout=DEFAULT_RUN_TIMEOUT):
+        self.rest = rest
+        self.name = name
+        self.parameters = parameters
+        self.timeout = timeout
+        self.id = next(RUN_IDS)
+        self.started = time.time()
+        self.finished = None
+        self.async_id = None
+        self.thread_id = None
+        self._cancelled = threading.Event()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def execute(self):
+        with RUNS_LOCK:
+            RUNS[self.id] = self
+
+        try:
+            return self._execute()
+        finally:
+            self.finished = time.time()
+            with RUNS_LOCK:
+                RUNS.pop(self.id, None)
+
+    def cancel(self):
+        self._cancelled.set()
+
+        if self.async_id:
+            try:
+                self.rest.cancel_async_operation(self.async_id, headers=self.rest._headers, verify=self.rest._verify)
+            except Exception as e:
+                print('Unable to cancel async operation of {}: {}'.format(self.name, e))
+
+        # Cancelling the async operation does not always stop the thread that runs the process
+        if self.thread_id:
+            try:
+                self.rest.POST(format_url("/api/v1/Threads('{}')/tm1.CancelOperation", str(self.thread_id)), '')
+            except Exception as e:
+                print('Unable to cancel thread {} of {}: {}'.format(self.thread_id, self.name, e))
+
+    def _execute(self):
+        url = format_url("/api/v1/Processes('{}')/tm1.ExecuteWithReturn?$expand=*", self.name)
+        body = {'Parameters': [{'Name': k, 'Value': v} for k, v in self.parameters.items()]}
+
+        # The server answers right away with the location of the operation instead of holding the request open
+        response = self.rest.POST(url, json.dumps(body, ensure_ascii=False), headers={'Prefer': 'respond-async'},
+                                  async_requests_mode=False)
+
+        location = response.headers.get('Location', '')
+        if response.status_code == 202 and "'" in location:
+            self.async_id = location.split("'")[1]
+            response = self._wait()
+
+        summary = response.json()
+        error_log_file = summary['ErrorLogFile']['Filename'] if summary.get('ErrorLogFile') else None
+        return summary['ProcessExecuteStatusCode'], error_log_file
+
+    def _wait(self):
+        wait = 0.1
+        while True:
+            if self._cancelled.wait(wait):
+                raise RunCancelled(self.name)
+
+            if self.timeout and self.elapsed > self.timeout:
+                self.cancel()
+                raise RunCancelled('{} timed out after {}s'.format(self.name, self.timeout))
+
+            response = self.rest.retrieve_async_response(self.async_id, headers=self.rest._headers,
+                                                         verify=self.rest._verify)
+            if response.status_code in [200, 201]:
+                response = self.rest.build_response_from_raw_bytes(response.content)
+                self.rest.verify_response(response=response)
+                return response
+
+            self.rest.verify_response(response=response)
+            wait = min(wait * 2, 1)
+
+
+def get_runs():
+    with RUNS_LOCK:
+        return sorted(RUNS.values(), key=lambda run: run.started)
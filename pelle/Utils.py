@@ -1,3 +1,4 @@
+import html
 import os
 import re
 import threading
@@ -230,6 +231,25 @@ def generate_rule_completion(cube):
     return completion
 
 
+def generate_completions(cubes, processes):
+    completions = {}
+
+    # Populate Rule completions
+    completions['source.tm1.rule'] = [generate_rule_completion(cube) for cube in cubes]
+
+    # Populate TI completions
+    completions['source.tm1.ti'] = \
+        [generate_turbo_integrator_completion(process) for process in processes] + \
+        [generate_turbo_integrator_cube_completion(cube, 'CELLGETN') for cube in cubes] + \
+        [generate_turbo_integrator_cube_completion(cube, 'CELLPUTN') for cube in cubes] + \
+        [generate_turbo_integrator_cube_completion(cube, 'CELLINCREMENTN') for cube in cubes] + \
+        [generate_turbo_integrator_cube_completion(cube, 'CELLGETS') for cube in cubes] + \
+        [generate_turbo_integrator_cube_completion(cube, 'CELLPUTS') for cube in cubes] + \
+        [generate_turbo_integrator_cube_locals_completion(cube) for cube in cubes]
+
+    return completions
+
+
 def view_to_process(view, process):
     if not process:
         file = os.path.basename(view.file_name())
@@ -237,6 +257,10 @@ def view_to_process(view, process):
         process = Process(name=file)
 
     content = view.substr(sublime.Region(0, view.size()))
+    return text_to_process(content, process)
+
+
+def process_sections(content):
     content = content.replace('\r\n', '\n').strip('\n')
     content = content.split('\n')
 
@@ -264,6 +288,26 @@ def view_to_process(view, process):
     for section in ['PARAMETERS', 'DATASOURCE', 'VARIABLES']:
         section_text[section] = section_text[section].replace("### ", "")
 
+    return section_text
+
+
+def datasource_fields(content):
+    # REST names of the datasource settings the file holds, falsy settings are never written to it
+    datasource = yaml.safe_load(process_sections(content)['DATASOURCE'])
+    if not isinstance(datasource, dict):
+        return {'Type'}
+
+    fields = set()
+    for key in datasource:
+        parts = key.split('_')
+        fields.add('Type' if key == 'type' else parts[0] + ''.join(part.capitalize() for part in parts[1:]))
+
+    return fields
+
+
+def text_to_process(content, process):
+    section_text = process_sections(content)
+
     parameters = yaml.safe_load(section_text['PARAMETERS'])
     if parameters == 'None':
         parameters = []
@@ -287,7 +331,7 @@ def view_to_process(view, process):
             else:
                 print('encountered unknown datasource setting: ' + key)
         except Exception as e:
-            sublime.message_dialog('An error occurred updating {}\n\n{}'.format(file, e))
+            sublime.message_dialog('An error occurred updating {}\n\n{}'.format(process.name, e))
             raise
 
     # Variables
@@ -315,23 +359,78 @@ def view_to_process(view, process):
     return process
 
 
-def highlight_errors(view, popup_message, line_number, procedure):
+def section_lines(content):
+    sections = {}
+    for index, line in enumerate(content.replace('\r\n', '\n').split('\n')):
+        match = re.match(r'^### (PROLOG|METADATA|DATA|EPILOG):', line)
+        if match and match.group(1) not in sections:
+            sections[match.group(1)] = index
+    return sections
+
+
+def error_line(sections, line_number, procedure):
+    # The server counts its two generated statement lines where the file has the section header and a blank line
     if procedure:
-        highlight_region = view.find('(### ' + procedure.upper() + ':)(.*?)(\n)', 0)
-        for _ in range(1, line_number):
-            highlight_region = view.find('(.*?)(\n)', highlight_region.b)
-        highlight_region = sublime.Region(highlight_region.a, highlight_region.b - 1)
-    else:
-        highlight_region = view.line(
-            sublime.Region(view.text_point(line_number - 1, 0), view.text_point(line_number - 1, 0)))
+        return sections.get(procedure.upper(), 0) + line_number - 1
+    return line_number - 1
+
+
+def highlight_errors(view, errors):
+    def do_highlight():
+        if not view.is_valid():
+            return
+
+        sections = section_lines(view.substr(sublime.Region(0, view.size())))
+        lines = [error_line(sections, error['LineNumber'], error.get('Procedure')) for error in errors]
+        regions = mark_errors(view, lines, [error['Message'] for error in errors])
+
+        view.show(regions[0], True)
+        # Let the view scroll before the popup is placed
+        sublime.set_timeout(lambda: view.show_popup(html.escape(errors[0]['Message']), location=regions[0].b), 50)
+
+    if errors:
+        sublime.set_timeout(do_highlight, 0)
+
 
-    view.add_regions('error', [highlight_region], "invalid")
-    view.show(highlight_region, True)
+def mark_errors(view, lines, messages):
+    regions = [view.line(view.text_point(line, 0)) for line in lines]
+    view.add_regions('error', regions, 'invalid', annotations=[html.escape(message) for message in messages],
+                     annotation_color='var(--redish)')
+    return regions
 
-    while not view.visible_region().contains(highlight_region):
-        time.sleep(0.01)
 
-    view.show_popup(popup_message, location=highlight_region.b)
+def show_error_panel(window, name, errors):
+    output = window.create_output_panel(name)
+    output.settings().set('result_file_regex', r'^(.+?):(\d+): (.*)$')
+    output.run_command('erase_view')
+    output.run_command('append', {'characters': '\n'.join(
+        '{}:{}: {}'.format(file, line + 1, message) for _, file, line, message in errors)})
+    window.run_command('show_panel', {'panel': 'output.' + name})
+
+    # Mark the failing lines in files that are already open
+    by_file = {}
+    for _, file, line, message in errors:
+        by_file.setdefault(file, []).append((line, message))
+
+    for view in window.views():
+        if view.file_name() in by_file:
+            lines, messages = zip(*by_file[view.file_name()])
+            mark_errors(view, lines, messages)
+
+
+class StepTimer:
+    def __init__(self):
+        self.steps = []
+
+    def time(self, step, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.steps.append((step, time.perf_counter() - start))
+
+    def __str__(self):
+        return ', '.join('{} {:.0f}ms'.format(step, elapsed * 1000) for step, elapsed in self.steps)
 
 
 def run_async(runnable):
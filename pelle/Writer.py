@@ -0,0 +1,66 @@
+import hashlib
+import os
+import threading
+import traceback
+
+
+def file_hash(file):
+    try:
+        with open(file, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class ProjectWriter:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self._lock = threading.Lock()
+
+    def write(self, file, content):
+        # Same newline translation as a text mode write, so files compare equal to what was written before
+        data = content.replace('\n', os.linesep).encode('utf-8')
+        existing = file_hash(file)
+
+        if existing == hashlib.sha1(data).hexdigest():
+            self._count('unchanged')
+            return False
+
+        # Write to a temp file in the same folder and swap it in, so watchers never see a partial file
+        folder, name = os.path.split(file)
+        temp = os.path.join(folder, '.{}.{}.tmp'.format(name, threading.get_ident()))
+        try:
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, file)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+        self._count('created' if existing is None else 'updated')
+        return True
+
+    def delete(self, file):
+        if not os.path.exists(file):
+            return False
+
+        try:
+            os.remove(file)
+        except Exception:
+            traceback.print_exc()
+            return False
+
+        self._count('deleted')
+        return True
+
+    def summary(self):
+        return '{} created, {} updated, {} unchanged, {} deleted'.format(
+            self.created, self.updated, self.unchanged, self.deleted)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)